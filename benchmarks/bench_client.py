@@ -0,0 +1,160 @@
+"""
+End to end benchmarks of the client against a local fake Binance server
+(benchmarks/fake_binance.py, run in its own process):
+
+- stream: messages/s and latency from the server send time to the listener,
+  through MarketEventsDataStream, Events.dispatch and the handlers
+- orders: create_order round trip, and its overhead over a bare aiohttp POST
+
+The results are printed as JSON (or written to --output) to be compared
+between releases.
+
+    python benchmarks/bench_client.py [--duration 5] [--rate 0] [--orders 1000]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import statistics
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("../")
+import binance
+from fake_binance import serve, load_recording
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "p50": values[len(values) // 2],
+        "p99": values[min(int(len(values) * 0.99), len(values) - 1)],
+        "max": values[-1],
+        "mean": statistics.fmean(values),
+    }
+
+
+async def bench_stream(endpoint, streams, duration, decoder):
+    client = binance.Client(endpoint=endpoint, json_decoder=decoder)
+    latencies = []
+
+    async def on_trade(event):
+        latencies.append(time.time() * 1000 - event.event_time)
+
+    for stream in streams:
+        client.events.register_event(on_trade, stream)
+    listener = asyncio.ensure_future(
+        client.start_market_events_listener(endpoint.replace("http", "ws"))
+    )
+    # the first messages include the connection setup
+    while not latencies:
+        await asyncio.sleep(0.01)
+    latencies.clear()
+    started_at = time.perf_counter()
+    await asyncio.sleep(duration)
+    received = len(latencies)
+    elapsed = time.perf_counter() - started_at
+    await client.stop_market_events_listener()
+    listener.cancel()
+    await client.close()
+    return {
+        "streams": len(streams),
+        "messages": received,
+        "seconds": elapsed,
+        "messages_per_second": received / elapsed,
+        "latency_ms": percentiles(latencies[:received]),
+    }
+
+
+async def bench_orders(endpoint, orders):
+    client = binance.Client("key", "secret", endpoint=endpoint)
+    await client.load()
+    await client.warm_up(1)
+    round_trips = []
+    for i in range(orders):
+        started_at = time.perf_counter()
+        await client.create_order(
+            "BTCUSDT", "BUY", "LIMIT", "GTC", quantity="0.001", price="20000.001"
+        )
+        round_trips.append((time.perf_counter() - started_at) * 1000)
+
+    # the same query, already encoded, without the client
+    body = b"symbol=BTCUSDT&side=BUY&type=LIMIT&timeInForce=GTC&quantity=0.001&price=20000&timestamp=0&signature=0"
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    bare_round_trips = []
+    for i in range(orders):
+        started_at = time.perf_counter()
+        async with client.session.post(
+            endpoint + "/api/v3/order", data=body, headers=headers
+        ) as response:
+            await response.read()
+        bare_round_trips.append((time.perf_counter() - started_at) * 1000)
+    await client.close()
+
+    round_trip = percentiles(round_trips)
+    bare_round_trip = percentiles(bare_round_trips)
+    return {
+        "orders": orders,
+        "round_trip_ms": round_trip,
+        "bare_round_trip_ms": bare_round_trip,
+        "overhead_ms": {
+            key: round_trip[key] - bare_round_trip[key] for key in ("p50", "p99")
+        },
+    }
+
+
+def start_server(rate, recording):
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve, args=(port_queue, rate, None, recording), daemon=True
+    )
+    server.start()
+    return server, f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="messages/s, 0 for the maximum"
+    )
+    parser.add_argument("--streams", type=int, default=10)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--decoder", default=None)
+    parser.add_argument("--recording", help="JSON lines file of stream messages")
+    parser.add_argument("--output", help="writes the JSON results to this file")
+    args = parser.parse_args()
+
+    recording = load_recording(args.recording) if args.recording else None
+    if recording:
+        streams = sorted({message["stream"] for message in recording})
+    else:
+        streams = [f"sym{i}usdt@trade" for i in range(args.streams)]
+
+    server, endpoint = start_server(args.rate, recording)
+    try:
+        results = {
+            "version": binance.__version__,
+            "python": platform.python_version(),
+            "rate": args.rate,
+            "stream": asyncio.run(
+                bench_stream(endpoint, streams, args.duration, args.decoder)
+            ),
+            "orders": asyncio.run(bench_orders(endpoint, args.orders)),
+        }
+    finally:
+        server.terminate()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the JSON decoders supported by binance.decoding on payloads shaped
+like the heaviest Binance messages: the all market tickers array and a 5000
+levels depth snapshot.
+
+    python benchmarks/bench_decoders.py [--number 50]
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+
+sys.path.append(".")
+sys.path.append("../")
+from binance.decoding import JSON_DECODERS, get_loads
+
+
+def ticker(symbol, rng):
+    price = rng.uniform(0.0001, 60000)
+    return {
+        "e": "24hrTicker",
+        "E": 1672515782136,
+        "s": symbol,
+        "p": f"{rng.uniform(-100, 100):.8f}",
+        "P": f"{rng.uniform(-10, 10):.3f}",
+        "w": f"{price:.8f}",
+        "x": f"{price:.8f}",
+        "c": f"{price:.8f}",
+        "Q": f"{rng.uniform(0, 10):.8f}",
+        "b": f"{price:.8f}",
+        "B": f"{rng.uniform(0, 10):.8f}",
+        "a": f"{price:.8f}",
+        "A": f"{rng.uniform(0, 10):.8f}",
+        "o": f"{price:.8f}",
+        "h": f"{price:.8f}",
+        "l": f"{price:.8f}",
+        "v": f"{rng.uniform(0, 1e6):.8f}",
+        "q": f"{rng.uniform(0, 1e6):.8f}",
+        "O": 1672429382136,
+        "C": 1672515782136,
+        "F": 1,
+        "L": rng.randint(1, 10 ** 6),
+        "n": rng.randint(1, 10 ** 6),
+    }
+
+
+def payloads():
+    rng = random.Random(42)
+    tickers = {
+        "stream": "!ticker@arr",
+        "data": [ticker(f"SYM{i}USDT", rng) for i in range(2000)],
+    }
+    depth = {
+        "lastUpdateId": 1027024,
+        "bids": [[f"{4 - i * 1e-4:.8f}", f"{rng.uniform(0, 100):.8f}"] for i in range(5000)],
+        "asks": [[f"{4 + i * 1e-4:.8f}", f"{rng.uniform(0, 100):.8f}"] for i in range(5000)],
+    }
+    return {
+        "!ticker@arr": json.dumps(tickers).encode(),
+        "depth 5000": json.dumps(depth).encode(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, payload in payloads().items():
+        print(f"{name} ({len(payload) / 1024:.0f} KiB)")
+        for decoder in JSON_DECODERS:
+            try:
+                loads = get_loads(decoder)
+            except ImportError:
+                print(f"  {decoder:8} not installed")
+                continue
+            duration = timeit.timeit(lambda: loads(payload), number=args.number)
+            print(f"  {decoder:8} {duration / args.number * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares BookSide (parallel lists kept sorted with bisect, O(n) memmove on
+inserts and deletes) with a dict of levels and a lazily sorted key list, on
+depth updates of a 5000 levels book followed by a best level read, as an
+order book listener would do.
+
+    python benchmarks/bench_order_book.py [--levels 5000] [--updates 100000]
+"""
+import argparse
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.append(".")
+sys.path.append("../")
+from binance.order_book import BookSide
+
+
+class DictBookSide:
+    # alternative: O(1) updates, the keys are sorted again when read after a change
+    def __init__(self):
+        self.levels = {}
+        self.keys = None
+
+    def update(self, price, quantity):
+        price = Decimal(price)
+        quantity = Decimal(quantity)
+        if quantity:
+            if price not in self.levels:
+                self.keys = None
+            self.levels[price] = quantity
+        elif self.levels.pop(price, None) is not None:
+            self.keys = None
+
+    def best(self):
+        if self.keys is None:
+            self.keys = sorted(self.levels)
+        price = self.keys[-1]
+        return price, self.levels[price]
+
+
+def updates(levels, count):
+    rng = random.Random(42)
+    # most updates are close to the top of the book
+    return [
+        (
+            f"{100 - min(int(rng.expovariate(0.05)), levels - 1) * 0.01:.2f}",
+            "0" if rng.random() < 0.3 else f"{rng.uniform(0, 10):.4f}",
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=100000)
+    args = parser.parse_args()
+
+    initial = [(f"{100 - i * 0.01:.2f}", "1") for i in range(args.levels)]
+    stream = updates(args.levels, args.updates)
+    sides = (("BookSide", lambda: BookSide(False)), ("dict", DictBookSide))
+    for name, side_class in sides:
+        side = side_class()
+        for price, quantity in initial:
+            side.update(price, quantity)
+
+        def run():
+            for price, quantity in stream:
+                side.update(price, quantity)
+                side.best()
+
+        duration = timeit.timeit(run, number=1)
+        print(f"{name:8} {duration / args.updates * 1e6:8.2f} us per update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+A local fake of Binance's REST API and combined websocket streams, used by the
+benchmarks so that they measure the client rather than the network.
+
+REST responses are synthetic unless a recording is given: a JSON object such
+as {"GET /api/v3/exchangeInfo": {...}}. Websocket messages are synthetic trades
+unless a recording is given: a JSON lines file of combined stream messages
+({"stream": ..., "data": {...}}), which is replayed in a loop. The event time E
+of every message is replaced by the (float) time at which it is sent.
+
+    python benchmarks/fake_binance.py [--port 8080] [--rate 10000]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from aiohttp import web
+
+SYMBOL = {
+    "symbol": "BTCUSDT",
+    "status": "TRADING",
+    "baseAsset": "BTC",
+    "baseAssetPrecision": 8,
+    "quoteAsset": "USDT",
+    "quotePrecision": 8,
+    "quoteAssetPrecision": 8,
+    "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET"],
+    "icebergAllowed": True,
+    "ocoAllowed": True,
+    "isSpotTradingAllowed": True,
+    "isMarginTradingAllowed": False,
+    "permissions": ["SPOT"],
+    "filters": [
+        {
+            "filterType": "PRICE_FILTER",
+            "minPrice": "0.01000000",
+            "maxPrice": "1000000.00000000",
+            "tickSize": "0.01000000",
+        },
+        {
+            "filterType": "LOT_SIZE",
+            "minQty": "0.00001000",
+            "maxQty": "9000.00000000",
+            "stepSize": "0.00001000",
+        },
+        {"filterType": "MIN_NOTIONAL", "minNotional": "10.00000000"},
+    ],
+}
+
+# generous limits so that the client's rate limiter never throttles a benchmark
+RATE_LIMITS = [
+    {
+        "rateLimitType": "REQUEST_WEIGHT",
+        "interval": "MINUTE",
+        "intervalNum": 1,
+        "limit": 10 ** 9,
+    },
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 10 ** 9},
+    {"rateLimitType": "ORDERS", "interval": "DAY", "intervalNum": 1, "limit": 10 ** 9},
+]
+
+
+def default_responses():
+    return {
+        "GET /api/v3/ping": {},
+        "GET /api/v3/time": None,
+        "GET /api/v3/exchangeInfo": {
+            "timezone": "UTC",
+            "serverTime": 0,
+            "rateLimits": RATE_LIMITS,
+            "exchangeFilters": [],
+            "symbols": [SYMBOL],
+        },
+        "POST /api/v3/order/test": {},
+        "POST /api/v3/order": None,
+    }
+
+
+def synthetic_messages(streams):
+    # one trade per stream, in turn
+    trade_ids = itertools.count(1)
+    for stream in itertools.cycle(streams):
+        symbol = stream.split("@")[0].upper()
+        trade_id = next(trade_ids)
+        yield {
+            "stream": stream,
+            "data": {
+                "e": "trade",
+                "E": 0,
+                "s": symbol,
+                "t": trade_id,
+                "p": "20000.01000000",
+                "q": "0.00100000",
+                "b": trade_id * 2,
+                "a": trade_id * 2 + 1,
+                "T": 0,
+                "m": trade_id % 2 == 0,
+                "M": True,
+            },
+        }
+
+
+class FakeBinance:
+    def __init__(self, rate=0, responses=None, recording=None):
+        # rate: messages per second of every connection, 0 for as fast as possible
+        self.rate = rate
+        self.responses = default_responses()
+        if responses:
+            self.responses.update(responses)
+        self.recording = recording
+        self.order_ids = itertools.count(1)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/stream", self.handle_stream)
+        app.router.add_route("*", "/{path:api/.*}", self.handle_rest)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def handle_rest(self, request):
+        key = f"{request.method} {request.path}"
+        if key not in self.responses:
+            return web.json_response({"code": -1100, "msg": "Unknown path."}, status=404)
+        response = self.responses[key]
+        if key == "GET /api/v3/time":
+            response = {"serverTime": int(time.time() * 1000)}
+        elif key == "POST /api/v3/order" and response is None:
+            form = await request.post()
+            response = {
+                "symbol": form.get("symbol"),
+                "orderId": next(self.order_ids),
+                "orderListId": -1,
+                "clientOrderId": form.get("newClientOrderId", "benchmark"),
+                "transactTime": int(time.time() * 1000),
+            }
+        return web.json_response(response, headers={"X-MBX-USED-WEIGHT-1M": "1"})
+
+    def _messages(self, streams):
+        if not self.recording:
+            return synthetic_messages(streams)
+        recorded = [m for m in self.recording if m["stream"] in streams]
+        return itertools.cycle(recorded or self.recording)
+
+    async def handle_stream(self, request):
+        streams = [s for s in request.query.get("streams", "").split("/") if s]
+        web_socket = web.WebSocketResponse()
+        await web_socket.prepare(request)
+        sender = asyncio.ensure_future(self._send(web_socket, streams))
+        try:
+            async for msg in web_socket:
+                content = json.loads(msg.data)
+                if content.get("method") == "SUBSCRIBE":
+                    streams.extend(content["params"])
+                result = streams if content.get("method") == "LIST_SUBSCRIPTIONS" else None
+                await web_socket.send_json({"result": result, "id": content.get("id")})
+        finally:
+            sender.cancel()
+        return web_socket
+
+    async def _send(self, web_socket, streams):
+        messages = self._messages(streams)
+        started_at = time.perf_counter()
+        sent = 0
+        while not web_socket.closed:
+            if self.rate:
+                due = int((time.perf_counter() - started_at) * self.rate) - sent
+                if due <= 0:
+                    await asyncio.sleep(0.001)
+                    continue
+            else:
+                due = 100
+            for _ in range(due):
+                message = next(messages)
+                message["data"]["E"] = time.time() * 1000
+                await web_socket.send_str(json.dumps(message))
+            sent += due
+            # let the reads and the other connections run
+            await asyncio.sleep(0)
+
+
+def load_recording(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def serve(port_queue, rate=0, responses=None, recording=None):
+    # entry point of the benchmark server process, puts the port in port_queue
+    async def run():
+        server = FakeBinance(rate, responses, recording)
+        port_queue.put(await server.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=0)
+    parser.add_argument("--responses", help="JSON file of recorded REST responses")
+    parser.add_argument("--recording", help="JSON lines file of stream messages")
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as file:
+            responses = json.load(file)
+    recording = load_recording(args.recording) if args.recording else None
+
+    async def run():
+        server = FakeBinance(args.rate, responses, recording)
+        port = await server.start(port=args.port)
+        print(f"Fake Binance listening on http://127.0.0.1:{port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
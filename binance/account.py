@@ -0,0 +1,229 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from decimal import Decimal
+
+# order statuses of the orders which are still in the order book
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED", "PENDING_CANCEL")
+
+
+class AccountState:
+    """
+    Open orders, balances and recent fills of the account, bootstrapped
+    through REST then kept up to date by the user data stream (which must be
+    started separately) and reconciled every reconcile_interval seconds.
+    Orders are stored with the same keys as the REST responses.
+    """
+
+    # delays between the reconciliation attempts after a gap, in seconds
+    retry_base = 1
+    retry_max = 60
+
+    def __init__(self, client, reconcile_interval=5 * 60, max_fills=1000):
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self.orders = {}
+        self.orders_by_client_id = {}
+        self.orders_by_symbol = defaultdict(dict)
+        self.balances = {}
+        self.balances_update_time = 0
+        self.fills = deque(maxlen=max_fills)
+        self._buffer = None
+        self._reconciliation = None
+        self._retry = None
+        # one reconciliation at a time, so that no buffered event is lost
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        events = self.client.events
+        events.register_user_event(self._handle_order_update, "executionReport")
+        events.register_user_event(self._handle_position, "outboundAccountPosition")
+        events.register_user_event(self._handle_balance_update, "balanceUpdate")
+        events.register_gap_listener(self._handle_gap)
+        await self.reconcile()
+        self._reconciliation = asyncio.ensure_future(self._reconcile_periodically())
+
+    def stop(self):
+        events = self.client.events
+        events.unregister(self._handle_order_update, "executionReport")
+        events.unregister(self._handle_position, "outboundAccountPosition")
+        events.unregister(self._handle_balance_update, "balanceUpdate")
+        events.unregister_gap_listener(self._handle_gap)
+        if self._reconciliation:
+            self._reconciliation.cancel()
+        if self._retry:
+            self._retry.cancel()
+
+    def open_orders(self, symbol=None):
+        if symbol:
+            return list(self.orders_by_symbol.get(symbol, {}).values())
+        return list(self.orders.values())
+
+    def order(self, order_id=None, client_order_id=None):
+        if order_id is not None:
+            return self.orders.get(order_id)
+        return self.orders_by_client_id.get(client_order_id)
+
+    def balance(self, asset):
+        return self.balances.get(asset, {"free": Decimal(0), "locked": Decimal(0)})
+
+    async def reconcile(self):
+        async with self._lock:
+            await self._reconcile()
+
+    async def _reconcile(self):
+        # events received while the snapshots are downloaded are replayed afterwards
+        self._buffer = []
+        try:
+            account, open_orders = await asyncio.gather(
+                self.client.fetch_account_information(),
+                self.client.fetch_open_orders(),
+            )
+        except BaseException:
+            buffered, self._buffer = self._buffer, None
+            for handle, event in buffered:
+                handle(event)
+            raise
+        self.balances = {
+            balance["asset"]: {
+                "free": Decimal(balance["free"]),
+                "locked": Decimal(balance["locked"]),
+            }
+            for balance in account["balances"]
+        }
+        self.balances_update_time = account.get("updateTime", 0)
+        self.orders.clear()
+        self.orders_by_client_id.clear()
+        self.orders_by_symbol.clear()
+        for order in open_orders:
+            self._store(order)
+        buffered, self._buffer = self._buffer, None
+        for handle, event in buffered:
+            handle(event)
+
+    async def _reconcile_periodically(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception:
+                logging.exception("Could not reconcile the account state")
+
+    async def _handle_gap(self, gap):
+        # the REST queries can fail right after a reconnection, they are retried
+        # in the background instead of raising in the gap listener
+        if "user" in gap.streams and not (self._retry and not self._retry.done()):
+            self._retry = asyncio.ensure_future(self._reconcile_until_success())
+
+    async def _reconcile_until_success(self):
+        attempt = 0
+        while True:
+            try:
+                await self.reconcile()
+                return
+            except Exception:
+                delay = min(self.retry_max, self.retry_base * 2 ** attempt)
+                attempt += 1
+                logging.exception(
+                    f"Could not reconcile the account state, retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+
+    def _store(self, order):
+        self.orders[order["orderId"]] = order
+        self.orders_by_client_id[order["clientOrderId"]] = order
+        self.orders_by_symbol[order["symbol"]][order["orderId"]] = order
+
+    def _remove(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order:
+            self.orders_by_client_id.pop(order["clientOrderId"], None)
+            symbol_orders = self.orders_by_symbol[order["symbol"]]
+            symbol_orders.pop(order_id, None)
+            if not symbol_orders:
+                del self.orders_by_symbol[order["symbol"]]
+
+    async def _handle_order_update(self, event):
+        if self._buffer is not None:
+            self._buffer.append((self._apply_order_update, event))
+        else:
+            self._apply_order_update(event)
+
+    async def _handle_position(self, event):
+        if self._buffer is not None:
+            self._buffer.append((self._apply_position, event))
+        else:
+            self._apply_position(event)
+
+    async def _handle_balance_update(self, event):
+        if self._buffer is not None:
+            self._buffer.append((self._apply_balance_update, event))
+        else:
+            self._apply_balance_update(event)
+
+    def _apply_order_update(self, event):
+        current = self.orders.get(event.order_id)
+        if current and current["updateTime"] > event.transaction_time:
+            return  # older than the REST snapshot
+        if event.execution_type == "TRADE":
+            self.fills.append(
+                {
+                    "symbol": event.symbol,
+                    "id": event.trade_id,
+                    "orderId": event.order_id,
+                    "side": event.side,
+                    "price": event.last_executed_price,
+                    "qty": event.last_executed_quantity,
+                    "quoteQty": event.last_quote_asset_transacted,
+                    "commission": event.commission_amount,
+                    "commissionAsset": event.commission_asset,
+                    "time": event.transaction_time,
+                    "isMaker": event.is_maker_side,
+                }
+            )
+        if event.order_status not in OPEN_STATUSES:
+            self._remove(event.order_id)
+            return
+        self._remove(event.order_id)
+        self._store(
+            {
+                "symbol": event.symbol,
+                "orderId": event.order_id,
+                "orderListId": event.order_list_id,
+                # for cancellations, "c" is the id of the cancel request
+                "clientOrderId": event.original_client_id or event.client_order_id,
+                "price": event.order_price,
+                "origQty": event.order_quantity,
+                "executedQty": event.cumulative_filled_quantity,
+                "cummulativeQuoteQty": event.quote_asset_transacted,
+                "status": event.order_status,
+                "timeInForce": event.time_in_force,
+                "type": event.order_type,
+                "side": event.side,
+                "stopPrice": event.stop_price,
+                "icebergQty": event.iceberg_quantity,
+                "time": event.order_creation_time,
+                "updateTime": event.transaction_time,
+                "isWorking": event.in_order_book,
+                "origQuoteOrderQty": event.quote_order_quantity,
+            }
+        )
+
+    def _apply_position(self, event):
+        if event.last_update < self.balances_update_time:
+            return
+        for asset, balance in event.balances.items():
+            self.balances[asset] = {
+                "free": Decimal(balance["free"]),
+                "locked": Decimal(balance["locked"]),
+            }
+        self.balances_update_time = event.last_update
+
+    def _apply_balance_update(self, event):
+        # the following outboundAccountPosition event gives the exact balances
+        if event.clear_time < self.balances_update_time:
+            return
+        balance = self.balance(event.asset)
+        self.balances[event.asset] = dict(
+            balance, free=balance["free"] + Decimal(event.balance_delta)
+        )
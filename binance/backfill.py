@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+# columns of a kline as returned by /api/v3/klines, the last one ("ignore") is dropped
+# see: https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#klinecandlestick-data
+KLINE_COLUMNS = (
+    ("open_time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),
+    ("quote_asset_volume", "<f8"),
+    ("trades_number", "<i8"),
+    ("taker_buy_base_asset_volume", "<f8"),
+    ("taker_buy_quote_asset_volume", "<f8"),
+)
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class KlineCache:
+    """
+    On disk columnar kline storage: one .npy file per column and per
+    symbol/interval (which can be memory-mapped) and a ranges.json index
+    of the [start, end) ranges already downloaded.
+    """
+
+    def __init__(self, directory):
+        if np is None:
+            raise ImportError("The kline cache requires numpy (pip install numpy).")
+        self.directory = directory
+
+    def _path(self, symbol, interval, name=None):
+        path = os.path.join(self.directory, symbol.upper(), interval)
+        return os.path.join(path, name) if name else path
+
+    def ranges(self, symbol, interval):
+        path = self._path(symbol, interval, "ranges.json")
+        if not os.path.isfile(path):
+            return []
+        with open(path) as index:
+            return json.load(index)
+
+    def missing(self, symbol, interval, start_time, end_time):
+        gaps = []
+        cursor = start_time
+        for start, end in self.ranges(symbol, interval):
+            if end <= cursor:
+                continue
+            if start >= end_time:
+                break
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < end_time:
+            gaps.append((cursor, end_time))
+        return gaps
+
+    def load(self, symbol, interval, start_time=None, end_time=None, mmap=True):
+        columns = {}
+        for name, dtype in KLINE_COLUMNS:
+            path = self._path(symbol, interval, f"{name}.npy")
+            if not os.path.isfile(path):
+                return {name: np.empty(0, dtype) for name, dtype in KLINE_COLUMNS}
+            columns[name] = np.load(path, mmap_mode="r" if mmap else None)
+        open_times = columns["open_time"]
+        first = 0 if start_time is None else np.searchsorted(open_times, start_time)
+        last = (
+            len(open_times)
+            if end_time is None
+            else np.searchsorted(open_times, end_time)
+        )
+        return {name: column[first:last] for name, column in columns.items()}
+
+    def store(self, symbol, interval, klines, start_time, end_time):
+        os.makedirs(self._path(symbol, interval), exist_ok=True)
+        if klines:
+            current = self.load(symbol, interval, mmap=False)
+            new = {
+                name: np.array([kline[i] for kline in klines], dtype=dtype)
+                for i, (name, dtype) in enumerate(KLINE_COLUMNS)
+            }
+            open_times = np.concatenate((current["open_time"], new["open_time"]))
+            # keep the freshest copy of every kline, sorted by open time
+            _, reversed_index = np.unique(open_times[::-1], return_index=True)
+            order = len(open_times) - 1 - reversed_index
+            for name, _ in KLINE_COLUMNS:
+                column = np.concatenate((current[name], new[name]))[order]
+                self._replace(symbol, interval, f"{name}.npy", lambda f: np.save(f, column))
+        ranges = merge_ranges(self.ranges(symbol, interval) + [[start_time, end_time]])
+        self._replace(
+            symbol, interval, "ranges.json", lambda f: f.write(json.dumps(ranges).encode())
+        )
+
+    def _replace(self, symbol, interval, name, write):
+        # write then rename, so that readers never see a partially written file
+        path = self._path(symbol, interval, name)
+        with open(path + ".tmp", "wb") as tmp_file:
+            write(tmp_file)
+        os.replace(path + ".tmp", path)
+
+
+class KlineBackfiller:
+    def __init__(self, client, cache, concurrency=8):
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+
+    async def backfill(self, symbols, intervals, start_time, end_time=None):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._backfill(semaphore, symbol, interval, start_time, end_time)
+                for symbol in symbols
+                for interval in intervals
+            )
+        )
+
+    async def _backfill(self, semaphore, symbol, interval, start_time, end_time):
+        interval = self.client.enum_to_value(interval)
+        now = int(time.time() * 1000)
+        end_time = min(end_time or now, now)
+        for gap_start, gap_end in self.cache.missing(
+            symbol, interval, start_time, end_time
+        ):
+            async with semaphore:
+                klines = [
+                    kline
+                    async for kline in self.client.iter_klines(
+                        symbol, interval, gap_start, gap_end - 1
+                    )
+                ]
+            # only closed klines are cached: the weeks and months are not aligned
+            # with the epoch, so the range stops where the open kline starts
+            closed = [kline for kline in klines if kline[6] < now]
+            if len(closed) < len(klines):
+                gap_end = klines[len(closed)][0]
+            if gap_end > gap_start:
+                self.cache.store(symbol, interval, closed, gap_start, gap_end)
@@ -0,0 +1,186 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from .definitions import interval_to_milliseconds
+from .events import Handlers
+
+
+class Bar:
+    # OHLCV bar, times in milliseconds (close_time is None for volume bars in progress)
+    __slots__ = (
+        "symbol",
+        "open_time",
+        "close_time",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "quote_volume",
+        "trades",
+    )
+
+    def __init__(self, symbol, open_time, close_time, price):
+        self.symbol = symbol
+        self.open_time = open_time
+        self.close_time = close_time
+        self.open = self.high = self.low = self.close = price
+        self.volume = Decimal(0)
+        self.quote_volume = Decimal(0)
+        self.trades = 0
+
+    def add(self, price, quantity, quote_quantity, trades=1):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += quantity
+        self.quote_volume += quote_quantity
+        self.trades += trades
+
+    def __repr__(self):
+        return (
+            f"Bar({self.symbol}, {self.open_time}, O={self.open} H={self.high} "
+            f"L={self.low} C={self.close} V={self.volume})"
+        )
+
+
+class BarBuilder(ABC):
+    """
+    Builds bars per symbol from the trade (@trade, @aggTrade) or closed kline
+    (@kline_<interval>) events of the registered streams. The last max_bars
+    closed bars of every symbol are kept in bars, handlers are called with
+    every closed bar.
+    """
+
+    def __init__(self, max_bars=1000):
+        self.bars = defaultdict(lambda: deque(maxlen=max_bars))
+        self.current = {}
+        self.handlers = Handlers()
+        self.late = 0
+        self._registered = []
+
+    def start(self, events, streams):
+        for stream in streams:
+            listener = self.on_kline if "@kline_" in stream else self.on_trade
+            events.register_event(listener, stream)
+            self._registered.append((events, listener, stream))
+
+    def stop(self):
+        for events, listener, stream in self._registered:
+            events.unregister(listener, stream)
+        self._registered = []
+
+    async def on_trade(self, event):
+        price = Decimal(event.price)
+        quantity = Decimal(event.quantity)
+        await self._add(
+            event.symbol, event.trade_time, price, quantity, price * quantity, 1
+        )
+
+    async def on_kline(self, event):
+        # the klines in progress are ignored, closed ones are aggregated
+        if not event.kline_closed:
+            return
+        symbol = event.symbol
+        time = event.kline_start_time
+        open_price = Decimal(event.kline_open_price)
+        volume = Decimal(event.kline_base_asset_volume)
+        quote_volume = Decimal(event.kline_quote_asset_volume)
+        trades = event.kline_trades_number
+        bar = await self._bar(symbol, time, open_price)
+        if bar is None:
+            return
+        bar.add(open_price, Decimal(0), Decimal(0), 0)
+        bar.add(Decimal(event.kline_high_price), Decimal(0), Decimal(0), 0)
+        bar.add(Decimal(event.kline_low_price), Decimal(0), Decimal(0), 0)
+        bar.add(Decimal(event.kline_close_price), volume, quote_volume, trades)
+        await self._after_update(bar, event.kline_close_time)
+
+    async def _add(self, symbol, time, price, quantity, quote_quantity, trades):
+        bar = await self._bar(symbol, time, price)
+        if bar is None:
+            return
+        bar.add(price, quantity, quote_quantity, trades)
+        await self._after_update(bar, time)
+
+    @abstractmethod
+    async def _bar(self, symbol, time, price):
+        # the bar in which an update at this time goes, None if it is too late
+        pass
+
+    async def _after_update(self, bar, time):
+        pass
+
+    async def _close(self, bar):
+        del self.current[bar.symbol]
+        self.bars[bar.symbol].append(bar)
+        await self.handlers(bar)
+
+
+class TimeBars(BarBuilder):
+    """
+    Bars of a fixed duration, such as "1s", "10s" or "4h" (an Interval or a
+    number of milliseconds). Bars built from trades are closed by the first
+    trade of the next bar, or by close_expired.
+    """
+
+    def __init__(self, interval, max_bars=1000):
+        super().__init__(max_bars)
+        if isinstance(interval, int):
+            self.milliseconds = interval
+        else:
+            self.milliseconds = interval_to_milliseconds(interval)
+
+    async def _bar(self, symbol, time, price):
+        open_time = time - time % self.milliseconds
+        bar = self.current.get(symbol)
+        if bar is not None:
+            if open_time == bar.open_time:
+                return bar
+            if open_time < bar.open_time:
+                self.late += 1
+                return None
+            await self._close(bar)
+        bar = Bar(symbol, open_time, open_time + self.milliseconds - 1, price)
+        self.current[symbol] = bar
+        return bar
+
+    async def _after_update(self, bar, time):
+        # the last kline of the bar closes it without waiting for the next one
+        if time >= bar.close_time:
+            await self._close(bar)
+
+    async def close_expired(self, now):
+        # closes the bars which ended before now (milliseconds)
+        for bar in [bar for bar in self.current.values() if bar.close_time < now]:
+            await self._close(bar)
+
+
+class VolumeBars(BarBuilder):
+    # bars closed once threshold of base asset has been traded
+    def __init__(self, threshold, max_bars=1000):
+        super().__init__(max_bars)
+        self.threshold = Decimal(threshold)
+
+    def _size(self, bar):
+        return bar.volume
+
+    async def _bar(self, symbol, time, price):
+        bar = self.current.get(symbol)
+        if bar is None:
+            bar = self.current[symbol] = Bar(symbol, time, None, price)
+        return bar
+
+    async def _after_update(self, bar, time):
+        if self._size(bar) >= self.threshold:
+            bar.close_time = time
+            await self._close(bar)
+
+
+class DollarBars(VolumeBars):
+    # bars closed once threshold of quote asset has been traded
+    def _size(self, bar):
+        return bar.quote_volume
@@ -3,12 +3,28 @@ from .errors import BinancePyError
 from .web_sockets import UserEventsDataStream, MarketEventsDataStream
 from . import OrderType
 from .events import Events
+from .order_book import OrderBook
+from .filters import SymbolRules
+from .symbols import SymbolTable
+from .decoding import get_loads, accepts_bytes
+from .clock import ServerClock
+from .snapshot import load_exchange_info, save_exchange_info
 from enum import Enum
 from typing import Union
+import asyncio
 import decimal
+import hashlib
+import logging
+import marshal
 import math
 
 
+def _digest(infos):
+    # identifies the content of the exchange infos, whatever the server time
+    content = {key: value for key, value in infos.items() if key != "serverTime"}
+    return hashlib.sha1(marshal.dumps(content)).digest()
+
+
 class Client:
     def __init__(
         self,
@@ -19,54 +35,161 @@ class Client:
         user_agent=None,
         proxy=None,
         session=None,
+        json_decoder=None,
+        connections_limit=100,
+        keepalive_timeout=60,
+        dns_cache_ttl=300,
+        signer=None,
+        metrics=None,
     ):
-        if api_secret + api_secret == 1:
+        # signer: a binance.signing.Ed25519Signer or RsaSigner replacing api_secret
+        if bool(api_key) != bool(api_secret or signer):
             raise ValueError(
                 "You cannot only specify a non empty api_key or an api_secret."
             )
+        # aiohttp already sets TCP_NODELAY on its sockets, note that the
+        # websockets also count in connections_limit
         self.http = HttpClient(
-            api_key, api_secret, endpoint, user_agent, proxy, session
+            api_key,
+            api_secret,
+            endpoint,
+            user_agent,
+            proxy,
+            session,
+            {
+                "limit": connections_limit,
+                "keepalive_timeout": keepalive_timeout,
+                "use_dns_cache": True,
+                "ttl_dns_cache": dns_cache_ttl,
+            },
+            signer,
         )
+        self.loads = get_loads(json_decoder)
+        # websocket frames and REST bodies can be given to the decoder without
+        # decoding them to str
+        self.loads_bytes = accepts_bytes(json_decoder)
+        self.http.loads = self.loads
+        self.http.loads_bytes = self.loads_bytes
+        # timestamps of the signed queries follow the server time, call
+        # clock.start() to keep it synchronized in the background
+        self.clock = ServerClock(self.fetch_server_time)
+        self.http.clock = self.clock
+        # a binance.metrics.Metrics to measure the latencies and throughputs
+        self.metrics = metrics
+        self.http.metrics = metrics
+        self.clock.registry = metrics
         self.user_agent = user_agent
-        self.proxy = None
+        self.proxy = proxy
         self.loaded = False
 
-    async def load(self):
-        infos = await self.fetch_exchange_info()
-
-        # load available symbols
-        self.symbols = {}
-        self.highest_precision = 8
-
-        original_symbol_infos = infos["symbols"]
-        for symbol_infos in original_symbol_infos:
-            symbol = symbol_infos.pop("symbol")
-            precision = symbol_infos["baseAssetPrecision"]
-            if precision > self.highest_precision:
-                self.highest_precision = precision
-            symbol_infos["filters"] = dict(
-                map(lambda x: (x.pop("filterType"), x), symbol_infos["filters"])
+    async def load(self, snapshot=None, refresh_interval=None):
+        """
+        Loads the symbols, filters and rate limits from the exchange infos.
+        With a snapshot path, they are read from this file when it exists
+        (see binance.snapshot), then refreshed from the API in the background,
+        every refresh_interval seconds if given, and the snapshot is updated.
+        """
+        loaded = load_exchange_info(snapshot) if snapshot else None
+        if loaded is None:
+            infos = await self.fetch_exchange_info()
+            self._apply_exchange_info(infos)
+            if snapshot:
+                save_exchange_info(snapshot, infos)
+        else:
+            self._apply_exchange_info(loaded[0])
+        if snapshot and (loaded or refresh_interval):
+            self._refresh = asyncio.ensure_future(
+                self._refresh_exchange_info(snapshot, refresh_interval, bool(loaded))
             )
-            self.symbols[symbol] = symbol_infos
 
+    def _apply_exchange_info(self, infos):
+        # the new tables are built aside then swapped, the infos are not mutated
+        symbols = SymbolTable(infos["symbols"])
+        highest_precision = max(
+            [8] + [info.base_asset_precision for info in symbols.values()]
+        )
+
+        # filters compiled for refine_price, refine_amount and order validation
+        grids = {}
+        rules = {
+            symbol: SymbolRules(symbol, symbol_infos, grids)
+            for symbol, symbol_infos in symbols.items()
+        }
+
+        # the raw infos are not kept, only what tells if they changed
+        self._exchange_info_digest = _digest(infos)
+        self.symbols = symbols
+        self.rules = rules
+        self.highest_precision = highest_precision
         decimal.getcontext().prec = (
             self.highest_precision + 4
         )  # for operations and rounding
 
         # load rate limits
         self.rate_limits = infos["rateLimits"]
+        self.http.rate_limiter.configure(self.rate_limits)
 
         self.loaded = True
 
+    async def _refresh_exchange_info(self, snapshot, interval, immediately):
+        # the first refresh replaces a snapshot which may be outdated
+        if not immediately:
+            await asyncio.sleep(interval)
+        while True:
+            try:
+                infos = await self.fetch_exchange_info()
+            except Exception:
+                logging.exception("Could not refresh the exchange infos")
+            else:
+                if _digest(infos) != self._exchange_info_digest:
+                    self._apply_exchange_info(infos)
+                    save_exchange_info(snapshot, infos)
+            if not interval:
+                return
+            await asyncio.sleep(interval)
+
     async def close(self):
+        if getattr(self, "_refresh", None):
+            self._refresh.cancel()
         await self.http.close_session()
 
+    @property
+    def session(self):
+        return self.http.session
+
+    async def warm_up(self, connections=2):
+        # opens (DNS, TCP and TLS) connections to the REST endpoint and keeps
+        # them in the pool so that the first orders don't pay for the handshakes
+        await asyncio.gather(*(self.ping() for _ in range(connections)))
+
     @property
     def events(self):
         if not hasattr(self, "_events"):
             self._events = Events()
+            self._events.metrics = self.metrics
         return self._events
 
+    @property
+    def order_books(self):
+        if not hasattr(self, "_order_books"):
+            self._order_books = {}
+        return self._order_books
+
+    def start_order_book(self, symbol, limit=1000, speed="100ms"):
+        # the book gets synced once the market events listener receives its stream
+        symbol = symbol.upper()
+        self.assert_symbol(symbol)
+        if symbol not in self.order_books:
+            order_book = OrderBook(self, symbol, limit, speed)
+            order_book.start()
+            self.order_books[symbol] = order_book
+        return self.order_books[symbol]
+
+    def stop_order_book(self, symbol):
+        order_book = self.order_books.pop(symbol.upper(), None)
+        if order_book:
+            order_book.stop()
+
     async def start_user_events_listener(
         self, endpoint="wss://stream.binance.com:9443"
     ):
@@ -78,11 +201,20 @@ class Client:
         await self.user_data_stream.stop()
 
     async def start_market_events_listener(
-        self, endpoint="wss://stream.binance.com:9443"
+        self,
+        endpoint="wss://stream.binance.com:9443",
+        max_streams_per_connection=1024,
+        connections=None,
+        decode_executor=None,
     ):
         # print(f"start_market_events_listener()")
         self.market_data_stream = MarketEventsDataStream(
-            self, endpoint, self.user_agent
+            self,
+            endpoint,
+            self.user_agent,
+            max_streams_per_connection,
+            connections,
+            decode_executor,
         )
         await self.market_data_stream.start()
 
@@ -101,40 +233,22 @@ class Client:
         return math.floor(f * 10 ** n) / 10 ** n
 
     def refine_amount(self, symbol, amount: Union[str, decimal.Decimal], quote=False):
-        if type(amount) == str:  # to save time for developers
-            amount = decimal.Decimal(amount)
-        if self.loaded:
-            precision = self.symbols[symbol]["baseAssetPrecision"]
-            lot_size_filter = self.symbols[symbol]["filters"]["LOT_SIZE"]
-            step_size = decimal.Decimal(lot_size_filter["stepSize"])
-            amount = (
-                (
-                    f"%.{precision}f"
-                    % self.truncate(
-                        amount if quote else (amount - amount % step_size), precision
-                    )
-                )
-                .rstrip("0")
-                .rstrip(".")
-            )
-        return amount
+        if not self.loaded:
+            return decimal.Decimal(amount) if type(amount) == str else amount
+        rules = self.rules[symbol]
+        return rules.round_quote_amount(amount) if quote else rules.round_quantity(amount)
 
     def refine_price(
         self, symbol, price: Union[str, decimal.Decimal]
     ) -> decimal.Decimal:
-        if isinstance(price, str):  # to save time for developers
-            price = decimal.Decimal(price)
+        if not self.loaded:
+            return decimal.Decimal(price) if isinstance(price, str) else price
+        return self.rules[symbol].round_price(price)
 
+    def validate_order(self, symbol, price=None, quantity=None, average_price=None):
+        # raises a FilterError if the order would be rejected by the symbol filters
         if self.loaded:
-            precision = self.symbols[symbol]["baseAssetPrecision"]
-            price_filter = self.symbols[symbol]["filters"]["PRICE_FILTER"]
-            price = price - (price % decimal.Decimal(price_filter["tickSize"]))
-            price = (
-                (f"%.{precision}f" % self.truncate(price, precision))
-                .rstrip("0")
-                .rstrip(".")
-            )
-        return price
+            self.rules[symbol].validate(price, quantity, average_price)
 
     def assert_symbol(self, symbol):
         if not symbol:
@@ -253,7 +367,8 @@ class Client:
             raise ValueError(
                 f"{limit} is not a valid limit. A valid limit should be > 0 and <= to 1000."
             )
-        if start_time:
+        # 0 is a valid start time (from the first kline)
+        if start_time is not None:
             params["startTime"] = start_time
         if end_time:
             params["endTime"] = end_time
@@ -307,7 +422,7 @@ class Client:
     # ACCOUNT ENDPOINTS
 
     # https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#new-order--trade
-    async def create_order(
+    def _order_params(
         self,
         symbol,
         side,
@@ -321,7 +436,6 @@ class Client:
         iceberg_quantity=None,
         response_type=None,
         receive_window=None,
-        test=False,
     ):
         self.assert_symbol(symbol)
         side = self.enum_to_value(side)
@@ -384,9 +498,79 @@ class Client:
         if receive_window:
             params["recvWindow"] = receive_window
 
+        return params
+
+    async def create_order(
+        self,
+        symbol,
+        side,
+        order_type,
+        time_in_force=None,
+        quantity=None,
+        quote_order_quantity=None,
+        price=None,
+        new_client_order_id=None,
+        stop_price=None,
+        iceberg_quantity=None,
+        response_type=None,
+        receive_window=None,
+        test=False,
+    ):
+        params = self._order_params(
+            symbol,
+            side,
+            order_type,
+            time_in_force,
+            quantity,
+            quote_order_quantity,
+            price,
+            new_client_order_id,
+            stop_price,
+            iceberg_quantity,
+            response_type,
+            receive_window,
+        )
         route = "/api/v3/order/test" if test else "/api/v3/order"
         return await self.http.send_api_call(route, "POST", data=params, signed=True)
 
+    async def create_orders(self, orders, concurrency=10, test=False):
+        """
+        Places a batch of orders, each one described by a dict of create_order
+        arguments. All the orders are checked (arguments and, once loaded, the
+        symbol filters) before the first one is sent, then the valid ones are
+        sent concurrently (the ORDERS rate limits still apply).
+        Returns, in the same order, the response or the exception of every order.
+        """
+        results = []
+        for order in orders:
+            try:
+                params = self._order_params(**order)
+                self.validate_order(
+                    params["symbol"], params.get("price"), params.get("quantity")
+                )
+                results.append(params)
+            # TypeError: an unknown argument, e.g. a misspelled key
+            except (TypeError, ValueError, BinancePyError) as e:
+                results.append(e)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        route = "/api/v3/order/test" if test else "/api/v3/order"
+
+        async def send(params):
+            async with semaphore:
+                return await self.http.send_api_call(
+                    route, "POST", data=params, signed=True
+                )
+
+        sent = await asyncio.gather(
+            *(send(params) for params in results if isinstance(params, dict)),
+            return_exceptions=True,
+        )
+        sent = iter(sent)
+        return [
+            next(sent) if isinstance(params, dict) else params for params in results
+        ]
+
     # https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#query-order-user_data
     async def fetch_order(  # lgtm [py/similar-function]
         self, symbol, order_id=None, origin_client_order_id=None, receive_window=None
@@ -456,9 +640,12 @@ class Client:
         )
 
     # https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#current-open-orders-user_data
-    async def fetch_open_orders(self, symbol, receive_window=None):
-        self.assert_symbol(symbol)
-        params = {"symbol": symbol}
+    async def fetch_open_orders(self, symbol=None, receive_window=None):
+        # without symbol, the open orders of every symbol are returned (weight 40)
+        params = {}
+        if symbol:
+            self.assert_symbol_exists(symbol)
+            params["symbol"] = symbol
         if receive_window:
             params["recvWindow"] = receive_window
 
@@ -725,6 +912,124 @@ class Client:
             signed=True,
         )
 
+    # PAGINATED QUERIES
+    # these async generators walk the cursors of the endpoints limited to 1000 rows,
+    # the next page is requested while the current one is being consumed
+
+    async def _paginate(self, fetch, kwargs, next_kwargs, limit, past_end=None):
+        next_page = asyncio.ensure_future(fetch(**kwargs, limit=limit))
+        try:
+            while next_page:
+                page = await next_page
+                next_page = None
+                if len(page) == limit:
+                    kwargs = next_kwargs(page[-1], kwargs)
+                    next_page = asyncio.ensure_future(fetch(**kwargs, limit=limit))
+                for row in page:
+                    if past_end and past_end(row):
+                        return
+                    yield row
+        finally:
+            if next_page:
+                next_page.cancel()
+
+    async def iter_klines(
+        self, symbol, interval, start_time, end_time=None, limit=1000
+    ):
+        if start_time is None:
+            raise ValueError("This query requires a start_time.")
+        # the next page starts after the close time of the last kline, the open
+        # time plus the interval would drift for the months (1M)
+        async for kline in self._paginate(
+            self.fetch_klines,
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "start_time": start_time,
+                "end_time": end_time,
+            },
+            lambda kline, kwargs: dict(kwargs, start_time=kline[6] + 1),
+            limit,
+        ):
+            yield kline
+
+    async def iter_aggregate_trades(
+        self, symbol, from_id=None, start_time=None, end_time=None, limit=1000
+    ):
+        # startTime and endTime can only be combined over one hour, so only the
+        # first page uses start_time and the following ones walk the trade ids
+        async for trade in self._paginate(
+            self.fetch_aggregate_trades_list,
+            {"symbol": symbol, "from_id": from_id, "start_time": start_time},
+            lambda trade, kwargs: {"symbol": symbol, "from_id": trade["a"] + 1},
+            limit,
+            (lambda trade: trade["T"] > end_time) if end_time else None,
+        ):
+            yield trade
+
+    async def iter_old_trades(self, symbol, from_id=None, limit=1000):
+        # without from_id Binance returns the most recent trades, so only that
+        # last page is yielded: pass a from_id to walk the history
+        async for trade in self._paginate(
+            self.fetch_old_trades_list,
+            {"symbol": symbol, "from_id": from_id},
+            lambda trade, kwargs: dict(kwargs, from_id=trade["id"] + 1),
+            limit,
+        ):
+            yield trade
+
+    async def iter_all_orders(
+        self,
+        symbol,
+        order_id=None,
+        start_time=None,
+        end_time=None,
+        limit=1000,
+        receive_window=None,
+    ):
+        # without order_id nor start_time Binance returns the most recent orders,
+        # so only that last page is yielded: pass one of them to walk the history
+        async for order in self._paginate(
+            self.fetch_all_orders,
+            {
+                "symbol": symbol,
+                "order_id": order_id,
+                "start_time": start_time,
+                "receive_window": receive_window,
+            },
+            lambda order, kwargs: dict(kwargs, order_id=order["orderId"] + 1),
+            limit,
+            (lambda order: order["time"] > end_time) if end_time else None,
+        ):
+            yield order
+
+    async def iter_account_trades(
+        self,
+        symbol,
+        start_time=None,
+        end_time=None,
+        from_id=None,
+        limit=1000,
+        receive_window=None,
+    ):
+        async for trade in self._paginate(
+            self.fetch_account_trade_list,
+            {
+                "symbol": symbol,
+                "start_time": start_time,
+                "from_id": from_id,
+                "receive_window": receive_window,
+            },
+            lambda trade, kwargs: {
+                "symbol": symbol,
+                "from_id": trade["id"] + 1,
+                "receive_window": receive_window,
+            },
+            limit,
+            (lambda trade: trade["time"] > end_time) if end_time else None,
+        ):
+            yield trade
+
     # USER DATA STREAM ENDPOINTS
 
     # https://github.com/binance-exchange/binance-official-api-docs/blob/master/user-data-stream.md#create-a-listenkey
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+
+class ServerClock:
+    """
+    Estimates the offset between the local clock and Binance's clock from
+    /api/v3/time samples. Like NTP, the sample with the lowest round trip time
+    of the last max_samples is trusted because its answer waited the least in
+    the network, the server time is assumed to be read in the middle of the
+    round trip. Offsets and round trip times are in milliseconds.
+    """
+
+    def __init__(self, fetch_time, interval=60, max_samples=8):
+        self.fetch_time = fetch_time
+        self.interval = interval
+        self.offset = 0.0
+        self.rtt = None
+        self.synced_at = None
+        # a binance.metrics.Metrics updated by every sample
+        self.registry = None
+        self._samples = deque(maxlen=max_samples)
+        self._task = None
+
+    def now(self):
+        # Binance's current time, as used by the timestamp parameter
+        return int(time.time() * 1000 + self.offset)
+
+    def metrics(self):
+        return {
+            "offset": self.offset,
+            "rtt": self.rtt,
+            "samples": len(self._samples),
+            "synced_at": self.synced_at,
+        }
+
+    async def sample(self):
+        sent_at = time.time() * 1000
+        response = await self.fetch_time()
+        received_at = time.time() * 1000
+        rtt = received_at - sent_at
+        offset = response["serverTime"] - (sent_at + received_at) / 2
+        self._samples.append((rtt, offset))
+        self.rtt, self.offset = min(self._samples)
+        self.synced_at = received_at
+        if self.registry:
+            self.registry.clock_offset.set(self.offset / 1000)
+            self.registry.clock_rtt.set(self.rtt / 1000)
+        return rtt, offset
+
+    async def sync(self, samples=4):
+        # a burst of samples, so that at least one is likely to be fast
+        for _ in range(samples):
+            await self.sample()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        await self.sync()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sample()
+            except Exception:
+                logging.exception("Could not synchronize with the server time")
@@ -0,0 +1,25 @@
+import importlib
+
+# fastest first, json (stdlib) is always available
+JSON_DECODERS = ("orjson", "ujson", "json")
+
+
+def get_loads(decoder=None):
+    """
+    Returns the loads function of a JSON decoder. decoder can be the name of a
+    module from JSON_DECODERS, any callable or None to use the fastest one installed.
+    """
+    if callable(decoder):
+        return decoder
+    for name in (decoder,) if decoder else JSON_DECODERS:
+        try:
+            return importlib.import_module(name).loads
+        except ImportError:
+            if decoder:
+                raise
+    raise ImportError("No JSON decoder available.")
+
+
+def accepts_bytes(decoder):
+    # custom decoders may only accept str, the bundled ones also decode bytes
+    return not callable(decoder)
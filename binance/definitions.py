@@ -84,6 +84,7 @@ class TimeInForce(Enum):
 # Kline/Candlestick chart intervals
 # m -> minutes; h -> hours; d -> days; w -> weeks; M -> months
 class Interval(Enum):
+    ONE_SECOND = "1s"
     ONE_MINUTE = "1m"
     THREE_MINUTES = "3m"
     FIVE_MINUTES = "5m"
@@ -99,3 +100,19 @@ class Interval(Enum):
     THREE_DAY = "3d"
     ONE_WEEK = "1w"
     ONE_MONTH = "1M"
+
+
+INTERVAL_MILLISECONDS = {
+    "s": 1000,
+    "m": 60 * 1000,
+    "h": 60 * 60 * 1000,
+    "d": 24 * 60 * 60 * 1000,
+    "w": 7 * 24 * 60 * 60 * 1000,
+    "M": 30 * 24 * 60 * 60 * 1000,  # only used to size pages, months are not fixed
+}
+
+
+def interval_to_milliseconds(interval):
+    if isinstance(interval, Enum):
+        interval = interval.value
+    return int(interval[:-1]) * INTERVAL_MILLISECONDS[interval[-1]]
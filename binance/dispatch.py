@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from itertools import count
+
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"  # wait for some room, which slows down the data stream
+    DROP_OLDEST = "drop_oldest"  # forget the oldest queued event
+    COALESCE_LATEST = "coalesce_latest"  # only keep the latest event per symbol
+
+
+def symbol_of(event):
+    try:
+        return event.symbol
+    except (AttributeError, KeyError):
+        return None
+
+
+class _Lane:
+    # queue drained by a single worker so that its events are handled in order
+    def __init__(self, max_size, policy):
+        self.max_size = max_size
+        self.policy = policy
+        self.items = OrderedDict()
+        self.ready = asyncio.Event()
+        self.room = asyncio.Event()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    async def put(self, key, item):
+        if key in self.items:
+            # coalesced: keep the position in the queue but deliver the newest event
+            self.items[key] = item
+            return
+        while len(self.items) >= self.max_size:
+            if self.policy is OverflowPolicy.BLOCK:
+                self.room.clear()
+                await self.room.wait()
+            else:
+                self.items.popitem(last=False)
+                self.dropped += 1
+        self.items[key] = item
+        self.ready.set()
+
+    async def get(self):
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        item = self.items.popitem(last=False)[1]
+        self.room.set()
+        return item
+
+
+class HandlerExecutor:
+    """
+    Runs the synchronous listeners of an event type in a dedicated bounded pool.
+    Events are split in lanes by symbol (see key), every lane has its own
+    bounded queue and delivers its events in order. executor can be any
+    concurrent.futures executor (e.g. a ProcessPoolExecutor, then the listeners
+    must be picklable functions), it defaults to a thread per lane.
+    """
+
+    def __init__(
+        self,
+        lanes=4,
+        max_queue_size=1000,
+        overflow=OverflowPolicy.BLOCK,
+        executor=None,
+        key=symbol_of,
+    ):
+        self.overflow = overflow
+        self.executor = executor if executor else ThreadPoolExecutor(lanes)
+        self.key = key
+        self.lanes = [_Lane(max_queue_size, overflow) for _ in range(lanes)]
+        self.lag = 0.0
+        self.processed = 0
+        self._counter = count()
+        self._workers = []
+
+    @property
+    def queue_depth(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    @property
+    def dropped(self):
+        return sum(lane.dropped for lane in self.lanes)
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue_depth,
+            "lag": self.lag,
+            "dropped": self.dropped,
+            "processed": self.processed,
+        }
+
+    async def submit(self, func, args):
+        if not self._workers:
+            self._workers = [
+                asyncio.ensure_future(self._work(lane)) for lane in self.lanes
+            ]
+        key = self.key(args[0]) if args else None
+        lane = self.lanes[hash(key) % len(self.lanes)]
+        if self.overflow is OverflowPolicy.COALESCE_LATEST and key is not None:
+            queue_key = (func, key)
+        else:
+            queue_key = next(self._counter)
+        await lane.put(queue_key, (time.monotonic(), func, args))
+
+    async def _work(self, lane):
+        loop = asyncio.get_running_loop()
+        while True:
+            queued_at, func, args = await lane.get()
+            self.lag = time.monotonic() - queued_at
+            try:
+                await loop.run_in_executor(self.executor, func, *args)
+            except Exception:
+                logging.exception(f"Listener {func} raised an exception")
+            self.processed += 1
+
+    def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self.executor.shutdown(wait=False)
+
+
+class Conflator:
+    """
+    Keeps the latest event of every symbol and only delivers the newest one to
+    the listener whenever it is ready, so that a slow listener never handles
+    stale quotes. snapshot() returns the latest event of every symbol.
+    """
+
+    def __init__(self, listener, key=symbol_of):
+        self.listener = listener
+        self.key = key
+        self.latest = {}
+        self.received = 0
+        self.delivered = 0
+        self._pending = OrderedDict()
+        self._ready = asyncio.Event()
+        self._worker = None
+
+    async def push(self, event):
+        key = self.key(event)
+        self.latest[key] = event
+        self._pending[key] = None
+        self.received += 1
+        self._ready.set()
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._deliver())
+
+    def snapshot(self):
+        return dict(self.latest)
+
+    async def _deliver(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+            event = self.latest[self._pending.popitem(last=False)[0]]
+            try:
+                if asyncio.iscoroutinefunction(self.listener):
+                    await self.listener(event)
+                else:
+                    await loop.run_in_executor(None, self.listener, event)
+            except Exception:
+                logging.exception(f"Listener {self.listener} raised an exception")
+            self.delivered += 1
+
+    def close(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
@@ -7,13 +7,20 @@ class UnknownEventType(BinancePyError):
 
 
 class BinanceError(BinancePyError):
-    pass
+    def __init__(self, message=None, code=None):
+        super().__init__(message)
+        # as defined here: https://github.com/binance/binance-spot-api-docs/blob/master/errors.md
+        self.code = code
 
 
 class QueryCanceled(BinancePyError):
     pass
 
 
+class FilterError(BinancePyError):
+    pass
+
+
 class HTTPError(BinancePyError):
 
     code = 400
@@ -1,12 +1,18 @@
 import asyncio
 import functools
+import time
 from collections import defaultdict
+from decimal import Decimal
 
+from .dispatch import Conflator
 from .errors import UnknownEventType
 
 
 # based on: https://stackoverflow.com/a/2022629/10144963
 class Handlers(list):
+    # synchronous listeners run in the default executor, unless a HandlerExecutor is set
+    executor = None
+
     async def __call__(self, *args, **kwargs):
         loop = asyncio.get_running_loop()
         for func in self:
@@ -15,7 +21,10 @@ class Handlers(list):
                 continue
             if kwargs:
                 func = functools.partial(func, **kwargs)
-            loop.run_in_executor(None, func, *args)
+            if self.executor:
+                await self.executor.submit(func, args)
+            else:
+                loop.run_in_executor(None, func, *args)
 
     def __repr__(self):
         return "Handlers(%s)" % list.__repr__(self)
@@ -35,52 +44,217 @@ class Events:
     def __init__(self):
         self.handlers = defaultdict(Handlers)
         self.registered_streams = set()
+        # called with (added streams, removed streams) by register_event and
+        # unregister, the running market stream uses it to (un)subscribe live
+        self.streams_observer = None
+        # stream name (or user event type) -> (wrapper class, handlers), so that
+        # dispatching an event is a single lookup
+        self.routes = {}
+        self.executors = {}
+        self.conflators = {}
+        # all market stream (e.g. !ticker@arr) -> listener of its whole payloads
+        self.array_listeners = {}
+        # fired with a StreamGap when a connection has been lost then restored
+        self.gap_handlers = Handlers()
+        # a binance.metrics.Metrics, the synchronous listeners running in an
+        # executor are only measured until they are submitted
+        self.metrics = None
+
+    def _update_route(self, key):
+        handlers = self.handlers.get(key)
+        if handlers:
+            handlers.executor = self.executors.get(key)
+            self.routes[key] = (wrapper_of(key), handlers)
+        else:
+            self.handlers.pop(key, None)
+            self.routes.pop(key, None)
 
     def register_user_event(self, listener, event_type):
         self.handlers[event_type].append(listener)
-
-    def register_event(self, listener, event_type):
-        self.registered_streams.add(event_type)
+        self._update_route(event_type)
+
+    def register_event(self, listener, event_type, conflate=False):
+        # conflate: only give the latest event of every symbol to the listener
+        if conflate:
+            conflator = Conflator(listener)
+            self.conflators[(event_type, listener)] = conflator
+            listener = conflator.push
+        self._add_stream(event_type)
         self.handlers[event_type].append(listener)
+        self._update_route(event_type)
+
+    def register_array_listener(self, listener, stream):
+        # the listener gets the list of events of every message at once
+        self._add_stream(stream)
+        self.array_listeners[stream] = listener
+
+    def unregister_array_listener(self, stream):
+        self.array_listeners.pop(stream, None)
+        self._remove_stream(stream)
+
+    def _add_stream(self, stream):
+        if stream not in self.registered_streams:
+            self.registered_streams.add(stream)
+            if self.streams_observer:
+                self.streams_observer((stream,), ())
+
+    def _remove_stream(self, stream):
+        if (
+            stream in self.registered_streams
+            and stream not in self.handlers
+            and stream not in self.array_listeners
+        ):
+            self.registered_streams.discard(stream)
+            if self.streams_observer:
+                self.streams_observer((), (stream,))
 
     def unregister(self, listener, event_type):
-        # self.handlers[event_type].remove(listener)
-        self.handlers.pop(event_type, None)
-        self.registered_streams.discard(event_type)
+        conflator = self.conflators.pop((event_type, listener), None)
+        if conflator:
+            conflator.close()
+            listener = conflator.push
+        handlers = self.handlers.get(event_type)
+        if handlers and listener in handlers:
+            handlers.remove(listener)
+        self._update_route(event_type)
+        self._remove_stream(event_type)
+
+    def register_gap_listener(self, listener):
+        self.gap_handlers.append(listener)
+
+    def unregister_gap_listener(self, listener):
+        if listener in self.gap_handlers:
+            self.gap_handlers.remove(listener)
+
+    def snapshot(self, event_type):
+        # latest event of every symbol received by the conflated listeners
+        latest = {}
+        for (conflated_type, _), conflator in self.conflators.items():
+            if conflated_type == event_type:
+                latest.update(conflator.latest)
+        return latest
+
+    def set_executor(self, event_type, executor):
+        # see binance.dispatch.HandlerExecutor, None restores the default executor
+        if executor:
+            self.executors[event_type] = executor
+        else:
+            self.executors.pop(event_type, None)
+        if event_type in self.handlers:
+            self.handlers[event_type].executor = executor
+
+    async def dispatch(self, event_data, stream=None):
+        key = stream if stream else event_data["e"]
+        route = self.routes.get(key)
+        if route is None:
+            # nobody listens to this event, don't even wrap it
+            return
+        wrapper, handlers = route
+        if wrapper is None:
+            # streams such as !ticker@arr only tell their type in the payload
+            wrapper = wrapper_of(event_data["e"]) if "e" in event_data else None
+            if wrapper is None:
+                raise UnknownEventType()
+            self.routes[key] = (wrapper, handlers)
+        if self.metrics:
+            started_at = time.perf_counter()
+            await handlers(wrapper(event_data, handlers))
+            self.metrics.handler_duration.observe(
+                time.perf_counter() - started_at, (key,)
+            )
+        else:
+            await handlers(wrapper(event_data, handlers))
 
     def wrap_event(self, event_data):
-        wrapper_by_type = {
-            "outboundAccountPosition": OutboundAccountPositionWrapper,
-            "balanceUpdate": BalanceUpdateWrapper,
-            "executionReport": OrderUpdateWrapper,
-            "listStatus": ListStatus,
-            "aggTrade": AggregateTradeWrapper,
-            "trade": TradeWrapper,
-            "kline": KlineWrapper,
-            "24hrMiniTicker": SymbolMiniTickerWrapper,
-            "24hrTicker": SymbolTickerWrapper,
-            "bookTicker": SymbolBookTickerWrapper,
-            "depth5": PartialBookDepthWrapper,
-            "depth10": PartialBookDepthWrapper,
-            "depth20": PartialBookDepthWrapper,
-            "depth": DiffDepthWrapper,
-        }
-
         stream = event_data["stream"] if "stream" in event_data else False
         event_type = event_data["e"] if "e" in event_data else stream
-        if "@" in event_type:  # lgtm [py/member-test-non-container]
-            event_type = event_type.split("@")[1]
-        if event_type.startswith("kline_"):
-            event_type = "kline"
-        if event_type not in wrapper_by_type:
+        wrapper = wrapper_of(event_type)
+        if wrapper is None:
             raise UnknownEventType()
-        wrapper = wrapper_by_type[event_type]
-        return wrapper(event_data, self.handlers[stream if stream else event_type])
+        key = stream if stream else event_type
+        return wrapper(event_data, self.handlers.get(key, Handlers()))
+
+
+class StreamGap:
+    # the events of these streams may have been missed between the two times
+    __slots__ = ("streams", "disconnected_at", "reconnected_at")
+
+    def __init__(self, streams, disconnected_at, reconnected_at):
+        self.streams = streams
+        self.disconnected_at = disconnected_at
+        self.reconnected_at = reconnected_at
+
+    def __repr__(self):
+        return f"StreamGap({len(self.streams)} streams, {self.reconnected_at - self.disconnected_at:.1f}s)"
+
+
+class Field:
+    """
+    Lazily reads a field of the raw event payload, eventually nested in
+    another field (e.g. the "k" object of a kline event).
+    """
+
+    __slots__ = ("key", "parent")
+
+    def __init__(self, key, parent=None):
+        self.key = key
+        self.parent = parent
+
+    def __get__(self, wrapper, owner):
+        if wrapper is None:
+            return self
+        if self.parent is None:
+            return wrapper._data[self.key]
+        return wrapper._data[self.parent][self.key]
+
+
+class DerivedField:
+    """
+    Field computed from the raw payload on first access, then cached.
+    """
+
+    __slots__ = ("name", "compute")
+
+    def __init__(self, compute):
+        self.name = compute.__name__
+        self.compute = compute
+
+    def __get__(self, wrapper, owner):
+        if wrapper is None:
+            return self
+        return wrapper._cached(self.name, self.compute)
 
 
 class BinanceEventWrapper:
+    # wrappers keep the raw payload and decode their fields when they are read
+    __slots__ = ("handlers", "_data", "_decoded")
+
     def __init__(self, event_data, handlers):
         self.handlers = handlers
+        self._data = event_data
+        self._decoded = None
+
+    @property
+    def raw(self):
+        return self._data
+
+    def __reduce__(self):
+        # the handlers stay in this process (e.g. when sent to a ProcessPoolExecutor)
+        return type(self), (self._data, None)
+
+    def _cached(self, key, compute):
+        if self._decoded is None:
+            self._decoded = {}
+        elif key in self._decoded:
+            return self._decoded[key]
+        value = self._decoded[key] = compute(self)
+        return value
+
+    def as_decimal(self, name):
+        return self._cached((name, Decimal), lambda self: Decimal(getattr(self, name)))
+
+    def as_float(self, name):
+        return self._cached((name, float), lambda self: float(getattr(self, name)))
 
     async def fire(self):
         if self.handlers:
@@ -91,212 +265,239 @@ class BinanceEventWrapper:
 
 
 class AggregateTradeWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):  # lgtm [py/similar-function]
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.aggregated_trade_id = event_data["a"]
-        self.price = event_data["p"]
-        self.quantity = event_data["q"]
-        self.first_trade_id = event_data["f"]
-        self.last_trade_id = event_data["l"]
-        self.trade_time = event_data["T"]
-        self.buyer_is_marker = event_data["m"]
-        self.ignore = event_data["M"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    aggregated_trade_id = Field("a")
+    price = Field("p")
+    quantity = Field("q")
+    first_trade_id = Field("f")
+    last_trade_id = Field("l")
+    trade_time = Field("T")
+    buyer_is_marker = Field("m")
+    ignore = Field("M")
 
 
 class TradeWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):  # lgtm [py/similar-function]
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.trade_id = event_data["t"]
-        self.price = event_data["p"]
-        self.quantity = event_data["q"]
-        self.buyer_order_id = event_data["b"]
-        self.seller_order_id = event_data["a"]
-        self.trade_time = event_data["T"]
-        self.buyer_is_marker = event_data["m"]
-        self.ignore = event_data["M"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    trade_id = Field("t")
+    price = Field("p")
+    quantity = Field("q")
+    buyer_order_id = Field("b")
+    seller_order_id = Field("a")
+    trade_time = Field("T")
+    buyer_is_marker = Field("m")
+    ignore = Field("M")
 
 
 class KlineWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        kline = event_data["k"]
-        self.kline_start_time = kline["t"]
-        self.kline_close_time = kline["T"]
-        self.kline_symbol = kline["s"]
-        self.kline_interval = kline["i"]
-        self.kline_first_trade_id = kline["f"]
-        self.kline_last_trade_id = kline["L"]
-        self.kline_open_price = kline["o"]
-        self.kline_close_price = kline["c"]
-        self.kline_high_price = kline["h"]
-        self.kline_low_price = kline["l"]
-        self.kline_base_asset_volume = kline["v"]
-        self.kline_trades_number = kline["n"]
-        self.kline_closed = kline["x"]
-        self.kline_quote_asset_volume = kline["q"]
-        self.kline_taker_buy_base_asset_volume = kline["V"]
-        self.kline_taker_buy_quote_asset_volume = kline["Q"]
-        self.kline_ignore = kline["B"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    kline_start_time = Field("t", "k")
+    kline_close_time = Field("T", "k")
+    kline_symbol = Field("s", "k")
+    kline_interval = Field("i", "k")
+    kline_first_trade_id = Field("f", "k")
+    kline_last_trade_id = Field("L", "k")
+    kline_open_price = Field("o", "k")
+    kline_close_price = Field("c", "k")
+    kline_high_price = Field("h", "k")
+    kline_low_price = Field("l", "k")
+    kline_base_asset_volume = Field("v", "k")
+    kline_trades_number = Field("n", "k")
+    kline_closed = Field("x", "k")
+    kline_quote_asset_volume = Field("q", "k")
+    kline_taker_buy_base_asset_volume = Field("V", "k")
+    kline_taker_buy_quote_asset_volume = Field("Q", "k")
+    kline_ignore = Field("B", "k")
 
 
 class SymbolMiniTickerWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):  # lgtm [py/similar-function]
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.close_price = event_data["c"]
-        self.open_price = event_data["o"]
-        self.high_price = event_data["h"]
-        self.low_price = event_data["l"]
-        self.total_traded_base_asset_volume = event_data["v"]
-        self.total_traded_quote_asset_volume = event_data["q"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    close_price = Field("c")
+    open_price = Field("o")
+    high_price = Field("h")
+    low_price = Field("l")
+    total_traded_base_asset_volume = Field("v")
+    total_traded_quote_asset_volume = Field("q")
 
 
 class SymbolTickerWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.price_change = event_data["p"]
-        self.price_change_percent = event_data["P"]
-        self.weighted_average_price = event_data["w"]
-        self.first_trade_before_window = event_data["x"]
-        self.last_price = event_data["c"]
-        self.last_quantity = event_data["Q"]
-        self.best_bid_price = event_data["b"]
-        self.best_bid_quantity = event_data["B"]
-        self.best_ask_price = event_data["a"]
-        self.best_ask_quantity = event_data["A"]
-        self.open_price = event_data["o"]
-        self.high_price = event_data["h"]
-        self.low_price = event_data["l"]
-        self.total_traded_base_asset_volume = event_data["v"]
-        self.total_traded_quote_asset_volume = event_data["q"]
-        self.statistics_open_time = event_data["O"]
-        self.statistics_close_time = event_data["C"]
-        self.first_trade_id = event_data["F"]
-        self.last_trade_id = event_data["L"]
-        self.total_trade_numbers = event_data["n"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    price_change = Field("p")
+    price_change_percent = Field("P")
+    weighted_average_price = Field("w")
+    first_trade_before_window = Field("x")
+    last_price = Field("c")
+    last_quantity = Field("Q")
+    best_bid_price = Field("b")
+    best_bid_quantity = Field("B")
+    best_ask_price = Field("a")
+    best_ask_quantity = Field("A")
+    open_price = Field("o")
+    high_price = Field("h")
+    low_price = Field("l")
+    total_traded_base_asset_volume = Field("v")
+    total_traded_quote_asset_volume = Field("q")
+    statistics_open_time = Field("O")
+    statistics_close_time = Field("C")
+    first_trade_id = Field("F")
+    last_trade_id = Field("L")
+    total_trade_numbers = Field("n")
 
 
 class SymbolBookTickerWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.order_book_updated = event_data["u"]
-        self.symbol = event_data["s"]
-        self.best_bid_price = event_data["b"]
-        self.best_bid_quantity = event_data["B"]
-        self.best_ask_price = event_data["a"]
-        self.best_ask_quantity = event_data["A"]
+    __slots__ = ()
+    order_book_updated = Field("u")
+    symbol = Field("s")
+    best_bid_price = Field("b")
+    best_bid_quantity = Field("B")
+    best_ask_price = Field("a")
+    best_ask_quantity = Field("A")
 
 
 class PartialBookDepthWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.last_update_id = event_data["lastUpdateId"]
-        self.bids = event_data["bids"]
-        self.asks = event_data["asks"]
+    __slots__ = ()
+    last_update_id = Field("lastUpdateId")
+    bids = Field("bids")
+    asks = Field("asks")
 
 
 class DiffDepthWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_type = event_data["e"]
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.first_update_id = event_data["U"]
-        self.final_update_id = event_data["u"]
-        self.bids = event_data["b"]
-        self.asks = event_data["a"]
+    __slots__ = ()
+    event_type = Field("e")
+    event_time = Field("E")
+    symbol = Field("s")
+    first_update_id = Field("U")
+    final_update_id = Field("u")
+    bids = Field("b")
+    asks = Field("a")
 
 
 # ACCOUNT UPDATE
 
 
 class OutboundAccountPositionWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_time = event_data["E"]
-        self.last_update = event_data["u"]
-        self.balances = dict(
-            map(lambda x: (x["a"], {"free": x["f"], "locked": x["l"]}), event_data["B"])
-        )
+    __slots__ = ()
+    event_time = Field("E")
+    last_update = Field("u")
+
+    @DerivedField
+    def balances(self):
+        return {
+            balance["a"]: {"free": balance["f"], "locked": balance["l"]}
+            for balance in self._data["B"]
+        }
 
 
 # BALANCE UPDATE
 
 
 class BalanceUpdateWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_time = event_data["E"]
-        self.asset = event_data["a"]
-        self.balance_delta = event_data["d"]
-        self.clear_time = event_data["T"]
+    __slots__ = ()
+    event_time = Field("E")
+    asset = Field("a")
+    balance_delta = Field("d")
+    clear_time = Field("T")
 
 
 # ORDER UPDATE
 
 
 class OrderUpdateWrapper(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.client_order_id = event_data["c"]
-        self.side = event_data["S"]
-        self.order_type = event_data["o"]
-        self.time_in_force = event_data["f"]
-        self.order_quantity = event_data["q"]
-        self.order_price = event_data["p"]
-        self.stop_price = event_data["P"]
-        self.iceberg_quantity = event_data["F"]
-        self.order_list_id = event_data["g"]
-        self.original_client_id = event_data["C"]
-        self.execution_type = event_data["x"]
-        self.order_status = event_data["X"]
-        self.order_reject_reason = event_data["r"]
-        self.order_id = event_data["i"]
-        self.last_executed_quantity = event_data["l"]
-        self.cumulative_filled_quantity = event_data["z"]
-        self.last_executed_price = event_data["L"]
-        self.commission_amount = event_data["n"]
-        self.commission_asset = event_data["N"]
-        self.transaction_time = event_data["T"]
-        self.trade_id = event_data["t"]
-        self.ignore_a = event_data["I"]
-        self.in_order_book = event_data["w"]
-        self.is_maker_side = event_data["m"]
-        self.ignore_b = event_data["M"]
-        self.order_creation_time = event_data["O"]
-        self.quote_asset_transacted = event_data["Z"]
-        self.last_quote_asset_transacted = event_data["Y"]
-        self.quote_order_quantity = event_data["Q"]
+    __slots__ = ()
+    event_time = Field("E")
+    symbol = Field("s")
+    client_order_id = Field("c")
+    side = Field("S")
+    order_type = Field("o")
+    time_in_force = Field("f")
+    order_quantity = Field("q")
+    order_price = Field("p")
+    stop_price = Field("P")
+    iceberg_quantity = Field("F")
+    order_list_id = Field("g")
+    original_client_id = Field("C")
+    execution_type = Field("x")
+    order_status = Field("X")
+    order_reject_reason = Field("r")
+    order_id = Field("i")
+    last_executed_quantity = Field("l")
+    cumulative_filled_quantity = Field("z")
+    last_executed_price = Field("L")
+    commission_amount = Field("n")
+    commission_asset = Field("N")
+    transaction_time = Field("T")
+    trade_id = Field("t")
+    ignore_a = Field("I")
+    in_order_book = Field("w")
+    is_maker_side = Field("m")
+    ignore_b = Field("M")
+    order_creation_time = Field("O")
+    quote_asset_transacted = Field("Z")
+    last_quote_asset_transacted = Field("Y")
+    quote_order_quantity = Field("Q")
 
 
 class ListStatus(BinanceEventWrapper):
-    def __init__(self, event_data, handlers):
-        super().__init__(event_data, handlers)
-        self.event_time = event_data["E"]
-        self.symbol = event_data["s"]
-        self.order_list_id = event_data["g"]
-        self.contingency_type = event_data["c"]
-        self.list_status_type = event_data["l"]
-        self.list_order_status = event_data["L"]
-        self.list_reject_reason = event_data["r"]
-        self.list_client_order_id = event_data["C"]
-        self.orders = dict(
-            map(lambda x: (x["s"], {"orderid": x["i"], "clientorderid": x["c"]})),
-            event_data["O"],
-        )
+    __slots__ = ()
+    event_time = Field("E")
+    symbol = Field("s")
+    order_list_id = Field("g")
+    contingency_type = Field("c")
+    list_status_type = Field("l")
+    list_order_status = Field("L")
+    list_reject_reason = Field("r")
+    list_client_order_id = Field("C")
+
+    @DerivedField
+    def orders(self):
+        return {
+            order["s"]: {"orderid": order["i"], "clientorderid": order["c"]}
+            for order in self._data["O"]
+        }
+
+
+WRAPPER_BY_TYPE = {
+    "outboundAccountPosition": OutboundAccountPositionWrapper,
+    "balanceUpdate": BalanceUpdateWrapper,
+    "executionReport": OrderUpdateWrapper,
+    "listStatus": ListStatus,
+    "aggTrade": AggregateTradeWrapper,
+    "trade": TradeWrapper,
+    "kline": KlineWrapper,
+    "24hrMiniTicker": SymbolMiniTickerWrapper,
+    "24hrTicker": SymbolTickerWrapper,
+    "bookTicker": SymbolBookTickerWrapper,
+    "depth5": PartialBookDepthWrapper,
+    "depth10": PartialBookDepthWrapper,
+    "depth20": PartialBookDepthWrapper,
+    "depth": DiffDepthWrapper,
+    "depthUpdate": DiffDepthWrapper,
+}
+
+
+# streams whose payloads have no "e" field and whose name tells no type
+STREAM_TYPES = {"!bookTicker": "bookTicker"}
+
+
+def wrapper_of(event_type):
+    # accepts an event type ("trade") or a stream name ("bnbbtc@trade")
+    event_type = STREAM_TYPES.get(event_type, event_type)
+    if "@" in event_type:
+        event_type = event_type.split("@")[1]
+    if event_type.startswith("kline_"):
+        event_type = "kline"
+    return WRAPPER_BY_TYPE.get(event_type)
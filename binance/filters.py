@@ -0,0 +1,185 @@
+import decimal
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from .errors import FilterError
+
+# independent from the context set by Client.load, large enough for any amount
+CONTEXT = decimal.Context(prec=50)
+
+
+def _decimal(value):
+    # the exact value of a float is not the one it was written with (0.07 is
+    # 0.07000000000000000666...), its shortest repr is
+    if isinstance(value, float):
+        return decimal.Decimal(repr(value))
+    return decimal.Decimal(value)
+
+
+def _decimals(value):
+    # number of significant decimals of a filter value such as "0.01000000"
+    value = _decimal(value).normalize(CONTEXT)
+    return max(-value.as_tuple().exponent, 0) if value else 0
+
+
+def to_units(value, decimals):
+    """
+    Converts a price or quantity to an integer number of 10^-decimals, rounded
+    towards zero, without going through floats.
+    """
+    if isinstance(value, str) and "e" not in value and "E" not in value:
+        whole, _, fraction = value.partition(".")
+        return int(whole + fraction[:decimals].ljust(decimals, "0"))
+    if not isinstance(value, decimal.Decimal):
+        value = _decimal(value)
+    return int(value.scaleb(decimals, CONTEXT))
+
+
+def format_units(units, decimals):
+    if not decimals:
+        return str(units)
+    digits = str(abs(units)).rjust(decimals + 1, "0")
+    fraction = digits[-decimals:].rstrip("0")
+    whole = ("-" if units < 0 else "") + digits[:-decimals]
+    return f"{whole}.{fraction}" if fraction else whole
+
+
+class _Grid:
+    # a price or quantity grid: values are integers of 10^-decimals, multiples of step
+    __slots__ = ("decimals", "step", "minimum", "maximum")
+
+    def __init__(self, step_size, minimum, maximum, precision):
+        step_size = decimal.Decimal(step_size)
+        self.decimals = min(
+            _decimals(step_size) if step_size else precision, precision
+        )
+        self.step = to_units(step_size, self.decimals)
+        self.minimum = to_units(minimum, self.decimals) if minimum else None
+        # a maximum of 0 means that there is no maximum
+        self.maximum = to_units(maximum, self.decimals) if maximum else None
+        self.maximum = self.maximum or None
+
+    def round(self, value):
+        units = to_units(value, self.decimals)
+        if self.step:
+            units -= units % self.step
+        return units
+
+    def check(self, symbol, name, value, step_name):
+        units = _decimal(value).scaleb(self.decimals, CONTEXT)
+        if units != units.to_integral_value() or (self.step and units % self.step):
+            raise FilterError(f"{symbol}: {value} is not a multiple of the {step_name}.")
+        if self.minimum is not None and units < self.minimum:
+            raise FilterError(f"{symbol}: {value} is below the minimum {name}.")
+        if self.maximum is not None and units > self.maximum:
+            raise FilterError(f"{symbol}: {value} is above the maximum {name}.")
+
+    def round_array(self, values):
+        if np is None:
+            raise ImportError("Rounding arrays requires numpy (pip install numpy).")
+        scale = 10 ** self.decimals
+        # rounding to 1e-6 unit first absorbs the float representation errors
+        # (e.g. 0.29 * 100 == 28.999999999999996)
+        units = np.floor(np.round(np.asarray(values, dtype=float) * scale, 6))
+        units = units.astype(np.int64)
+        if self.step:
+            units -= units % self.step
+        return units
+
+
+class SymbolRules:
+    """
+    PRICE_FILTER, LOT_SIZE, MIN_NOTIONAL and PERCENT_PRICE filters of a symbol,
+    compiled from the exchange infos into integer grids.
+    """
+
+    __slots__ = (
+        "symbol",
+        "price",
+        "quantity",
+        "amount",
+        "min_notional",
+        "multiplier_up",
+        "multiplier_down",
+    )
+
+    def __init__(self, symbol, symbol_infos, grids=None):
+        # grids: cache of the grids, shared by the symbols with the same filters
+        grids = {} if grids is None else grids
+
+        def grid(*parameters):
+            if parameters not in grids:
+                grids[parameters] = _Grid(*parameters)
+            return grids[parameters]
+
+        self.symbol = symbol
+        precision = symbol_infos["baseAssetPrecision"]
+        # prices and amounts are expressed in the quote asset
+        quote_precision = symbol_infos.get(
+            "quoteAssetPrecision", symbol_infos.get("quotePrecision", precision)
+        )
+        filters = symbol_infos["filters"]
+        price_filter = filters.get("PRICE_FILTER", {})
+        self.price = grid(
+            price_filter.get("tickSize", "0"),
+            price_filter.get("minPrice"),
+            price_filter.get("maxPrice"),
+            quote_precision,
+        )
+        lot_size = filters.get("LOT_SIZE", {})
+        self.quantity = grid(
+            lot_size.get("stepSize", "0"),
+            lot_size.get("minQty"),
+            lot_size.get("maxQty"),
+            precision,
+        )
+        # amounts expressed in the quote asset are only truncated to the precision
+        self.amount = grid("0", None, None, quote_precision)
+        min_notional = filters.get("MIN_NOTIONAL", filters.get("NOTIONAL", {}))
+        self.min_notional = (
+            decimal.Decimal(min_notional["minNotional"])
+            if "minNotional" in min_notional
+            else None
+        )
+        percent_price = filters.get("PERCENT_PRICE", {})
+        self.multiplier_up = decimal.Decimal(percent_price.get("multiplierUp", 0))
+        self.multiplier_down = decimal.Decimal(percent_price.get("multiplierDown", 0))
+
+    def round_price(self, price):
+        return format_units(self.price.round(price), self.price.decimals)
+
+    def round_quantity(self, quantity):
+        return format_units(self.quantity.round(quantity), self.quantity.decimals)
+
+    def round_quote_amount(self, amount):
+        return format_units(self.amount.round(amount), self.amount.decimals)
+
+    def round_prices(self, prices):
+        # vectorized (numpy) version of round_price, returns floats on the grid
+        return self.price.round_array(prices) / 10 ** self.price.decimals
+
+    def round_quantities(self, quantities):
+        return self.quantity.round_array(quantities) / 10 ** self.quantity.decimals
+
+    def validate(self, price=None, quantity=None, average_price=None):
+        # raises a FilterError if Binance would reject an order with these values
+        if price is not None:
+            self.price.check(self.symbol, "price", price, "tick size")
+            if average_price is not None and self.multiplier_up:
+                average_price = _decimal(average_price)
+                if not (
+                    average_price * self.multiplier_down
+                    <= _decimal(price)
+                    <= average_price * self.multiplier_up
+                ):
+                    raise FilterError(
+                        f"{self.symbol}: {price} is too far from the average price."
+                    )
+        if quantity is not None:
+            self.quantity.check(self.symbol, "quantity", quantity, "step size")
+        if price is not None and quantity is not None and self.min_notional:
+            if _decimal(price) * _decimal(quantity) < self.min_notional:
+                raise FilterError(f"{self.symbol}: the order notional is too small.")
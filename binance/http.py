@@ -2,86 +2,160 @@ from urllib.parse import urlencode
 from . import __version__
 import logging
 import aiohttp
-import hashlib
-import hmac
+import json
 import time
+import yarl
 from .errors import (
     RateLimitReached,
     BinanceError,
     WAFLimitViolated,
     IPAdressBanned,
     HTTPError,
-    QueryCanceled,
 )
+from .rate_limits import RateLimiter, request_weight, orders_count
+from .signing import HmacSigner
 
 
 class HttpClient:
-    def __init__(self, api_key, api_secret, endpoint, user_agent, proxy, session):
+    def __init__(
+        self,
+        api_key,
+        api_secret,
+        endpoint,
+        user_agent,
+        proxy,
+        session=None,
+        connector_options=None,
+        signer=None,
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
+        # signs the payload of the signed queries, see binance.signing
+        if signer is None and api_secret:
+            signer = HmacSigner(api_secret)
+        self.signer = signer
         self.endpoint = endpoint
-        self.rate_limit_reached = False
+        self.rate_limiter = RateLimiter()
+        self.loads = json.loads
+        self.loads_bytes = True
         if user_agent:
             self.user_agent = user_agent
         else:
             self.user_agent = f"binance.py (https://git.io/binance.py, {__version__})"
         self.proxy = proxy
-        self.session = session if session else aiohttp.ClientSession()
+        # a ServerClock, see Client.clock
+        self.clock = None
+        # a binance.metrics.Metrics, see Client(metrics=...)
+        self.metrics = None
+        self._session = session
+        self.connector_options = connector_options or {}
+
+    @property
+    def session(self):
+        # created on first use because a session must belong to a running loop;
+        # it is shared by the REST queries and the websockets
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.connector_options)
+            )
+        return self._session
 
     def _generate_signature(self, data):
-        return hmac.new(
-            self.api_secret.encode("utf-8"), data.encode("utf-8"), hashlib.sha256,
-        ).hexdigest()
+        return self.signer.sign(data)
 
     async def handle_errors(self, response):
         if response.status >= 500:
             logging.error(
                 "An issue occured on Binance's side; the execution status is UNKNOWN and could have been a success"
             )
-        if response.status == 429:
-            self.rate_limit_reached = True
-            raise RateLimitReached()
-        payload = await response.json()
+        if response.status in (418, 429):
+            # Retry-After is the number of seconds to wait before a new query
+            self.rate_limiter.block(int(response.headers.get("Retry-After", 60)))
+            raise RateLimitReached() if response.status == 429 else IPAdressBanned()
+        body = await response.read()
+        if body and not self.loads_bytes:
+            body = body.decode()
+        payload = self.loads(body) if body else None
         if payload and "code" in payload:
             # as defined here: https://github.com/binance/binance-spot-api-docs/blob/master/errors.md#error-codes-for-binance-2019-09-25
-            raise BinanceError(payload["msg"])
+            raise BinanceError(payload["msg"], payload["code"])
         if response.status >= 400:
             if response.status == 403:
                 raise WAFLimitViolated()
-            elif response.status == 418:
-                raise IPAdressBanned()
             else:
                 raise HTTPError("Malformed request. The issue is on the sender's side")
         return payload
 
+    def timestamp(self):
+        return self.clock.now() if self.clock else int(time.time() * 1000)
+
     async def send_api_call(
         self, path, method="GET", signed=False, send_api_key=True, **kwargs
     ):
-        if self.rate_limit_reached:
-            raise QueryCanceled(
-                "Rate limit reached, to avoid an IP ban, this query has been automatically cancelled"
+        try:
+            return await self._send_api_call(
+                path, method, signed, send_api_key, **kwargs
+            )
+        except BinanceError as error:
+            # -1021: the timestamp is outside of the recvWindow, the clock drifted
+            if error.code != -1021 or not self.clock:
+                raise
+            await self.clock.sync()
+            return await self._send_api_call(
+                path, method, signed, send_api_key, **kwargs
             )
+
+    async def _send_api_call(self, path, method, signed, send_api_key, **kwargs):
+        await self.rate_limiter.acquire(
+            request_weight(path, method, kwargs.get("params", kwargs.get("data"))),
+            orders_count(path, method),
+        )
         # return the JSON body of a call to Binance REST API
         kwargs = dict({"headers": {"User-Agent": self.user_agent}}, **kwargs,)
         if send_api_key:
             kwargs["headers"]["X-MBX-APIKEY"] = self.api_key
+        if self.proxy:
+            kwargs["proxy"] = self.proxy
 
+        # the query string and the body are encoded once, signed, then sent as is
+        params = kwargs.pop("params", None)
+        data = kwargs.pop("data", None)
+        if signed:
+            location = params if params is not None else data
+            location = dict(location or {}, timestamp=self.timestamp())
+            if params is not None:
+                params = location
+            else:
+                data = location
+        query = urlencode(params) if params else ""
+        body = urlencode(data) if data else ""
         if signed:
-            content = ""
-            location = "params" if "params" in kwargs else "data"
-            kwargs[location]["timestamp"] = int(time.time() * 1000)
-            if "params" in kwargs:
-                content += urlencode(kwargs["params"])
-            if "data" in kwargs:
-                content += urlencode(kwargs["data"])
-            kwargs[location]["signature"] = self._generate_signature(content)
-            if self.proxy:
-                kwargs["proxy"] = self.proxy
+            signature = "signature=" + self._generate_signature(query + body)
+            if params is not None:
+                query = f"{query}&{signature}"
+            else:
+                body = f"{body}&{signature}"
+        url = self.endpoint + path
+        if query:
+            url = yarl.URL(f"{url}?{query}", encoded=True)
+        if body:
+            kwargs["data"] = body.encode("ascii")
+            kwargs["headers"]["Content-Type"] = "application/x-www-form-urlencoded"
+
+        started_at = time.perf_counter()
+        async with self.session.request(method, url, **kwargs) as response:
+            self.rate_limiter.update(response.headers)
+            try:
+                return await self.handle_errors(response)
+            finally:
+                if self.metrics:
+                    self._measure(method, path, time.perf_counter() - started_at)
 
-        async with self.session.request(
-            method, self.endpoint + path, **kwargs,
-        ) as response:
-            return await self.handle_errors(response)
+    def _measure(self, method, path, duration):
+        self.metrics.request_duration.observe(duration, (method, path))
+        for limit, used in self.rate_limiter.usage().items():
+            self.metrics.used_weight.set(used, (limit,))
 
     async def close_session(self):
-        await self.session.close()
\ No newline at end of file
+        if self._session:
+            await self._session.close()
\ No newline at end of file
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from bisect import bisect_left
+
+# in seconds, from a fast local handler to a slow REST query
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+
+def _format_labels(names, values, extra=""):
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter:
+    type = "counter"
+
+    # values are keyed by the tuple of label values, given positionally
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        return dict(self.values)
+
+    def _samples(self):
+        for labels, value in self.values.items():
+            yield self.name + _format_labels(self.label_names, labels), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, labels=()):
+        self.values[labels] = value
+
+
+class Histogram(Counter):
+    type = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        # values[labels] = [count per bucket (the last one is +Inf), sum, count]
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def snapshot(self):
+        return {
+            labels: {"sum": total, "count": count, "mean": total / count}
+            for labels, (_, total, count) in self.values.items()
+        }
+
+    def quantile(self, quantile, labels=()):
+        # upper bound of the bucket containing the quantile
+        counts, _, count = self.values[labels]
+        rank = quantile * count
+        cumulated = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulated += bucket_count
+            if cumulated >= rank:
+                return bound
+
+    def _samples(self):
+        for labels, (counts, total, count) in self.values.items():
+            cumulated = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulated += bucket_count
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{le}", cumulated
+            label_text = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_text}", total
+            yield f"{self.name}_count{label_text}", count
+
+
+class Metrics:
+    """
+    Registry of the metrics measured by the client (see Client(metrics=...)).
+    Updating a metric is a dict operation, nothing is exported until
+    prometheus() or snapshot() is called, or a CallbackExporter runs.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.metrics = {}
+        self.request_duration = self.histogram(
+            "binance_request_duration_seconds",
+            "Duration of the REST queries.",
+            ("method", "path"),
+            buckets,
+        )
+        self.used_weight = self.gauge(
+            "binance_used_weight",
+            "Weight and orders used in the current rate limit windows.",
+            ("limit",),
+        )
+        self.messages = self.counter(
+            "binance_websocket_messages_total",
+            "Messages received per stream.",
+            ("stream",),
+        )
+        self.received_bytes = self.counter(
+            "binance_websocket_bytes_total", "Bytes received per stream.", ("stream",),
+        )
+        self.event_lag = self.histogram(
+            "binance_event_lag_seconds",
+            "Delay between the exchange event time and its reception.",
+            ("stream",),
+            buckets,
+        )
+        self.decode_duration = self.histogram(
+            "binance_decode_duration_seconds",
+            "Duration of the JSON decoding of the messages.",
+            buckets=buckets,
+        )
+        self.clock_offset = self.gauge(
+            "binance_clock_offset_seconds",
+            "Estimated offset of the server clock from the local clock.",
+        )
+        self.clock_rtt = self.gauge(
+            "binance_clock_rtt_seconds",
+            "Round trip time of the clock synchronization sample in use.",
+        )
+        self.handler_duration = self.histogram(
+            "binance_handler_duration_seconds",
+            "Duration of the dispatch of an event to its listeners.",
+            ("event",),
+            buckets,
+        )
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def prometheus(self):
+        # Prometheus text exposition format
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name} {value}" for name, value in metric._samples())
+        return "\n".join(lines) + "\n"
+
+
+class CallbackExporter:
+    # calls callback(metrics.snapshot()) every interval seconds
+    def __init__(self, metrics, callback, interval=10):
+        self.metrics = metrics
+        self.callback = callback
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = self.callback(self.metrics.snapshot())
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logging.exception("Could not export the metrics")
@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+from .errors import QueryCanceled
+
+# see: https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#limits
+INTERVAL_SECONDS = {"SECOND": 1, "MINUTE": 60, "HOUR": 60 * 60, "DAY": 24 * 60 * 60}
+
+DEFAULT_RATE_LIMITS = [
+    {
+        "rateLimitType": "REQUEST_WEIGHT",
+        "interval": "MINUTE",
+        "intervalNum": 1,
+        "limit": 1200,
+    },
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 50},
+    {"rateLimitType": "ORDERS", "interval": "DAY", "intervalNum": 1, "limit": 160000},
+    {
+        "rateLimitType": "RAW_REQUESTS",
+        "interval": "MINUTE",
+        "intervalNum": 5,
+        "limit": 6100,
+    },
+]
+
+# request weight of every endpoint wrapped by the client, (weight, weight without symbol)
+ENDPOINT_WEIGHTS = {
+    "/api/v3/ping": (1, 1),
+    "/api/v3/time": (1, 1),
+    "/api/v3/exchangeInfo": (10, 10),
+    "/api/v3/trades": (1, 1),
+    "/api/v3/historicalTrades": (5, 5),
+    "/api/v3/aggTrades": (1, 1),
+    "/api/v3/klines": (1, 1),
+    "/api/v3/avgPrice": (1, 1),
+    "/api/v3/ticker/24hr": (1, 40),
+    "/api/v3/ticker/price": (1, 2),
+    "/api/v3/ticker/bookTicker": (1, 2),
+    "/api/v3/order": (1, 1),
+    "/api/v3/order/test": (1, 1),
+    "/api/v3/openOrders": (3, 40),
+    "/api/v3/allOrders": (10, 10),
+    "/api/v3/order/oco": (1, 1),
+    "/api/v3/orderList": (2, 2),
+    "/api/v3/allOrderList": (10, 10),
+    "/api/v3/openOrderList": (3, 3),
+    "/api/v3/account": (10, 10),
+    "/api/v3/myTrades": (10, 10),
+    "/api/v3/userDataStream": (1, 1),
+}
+
+DEPTH_WEIGHTS = ((100, 1), (500, 5), (1000, 10), (5000, 50))
+
+# number of orders counted against the ORDERS limits by each placement endpoint
+ORDERS_COUNT = {"/api/v3/order": 1, "/api/v3/order/oco": 2}
+
+
+def request_weight(path, method="GET", params=None):
+    params = params or {}
+    if path == "/api/v3/depth":
+        limit = params.get("limit", 100)
+        for max_limit, weight in DEPTH_WEIGHTS:
+            if limit <= max_limit:
+                return weight
+        return DEPTH_WEIGHTS[-1][1]
+    if path == "/api/v3/order" and method == "GET":
+        return 2
+    if path not in ENDPOINT_WEIGHTS:
+        # the sapi endpoints are limited separately and are not tracked here
+        return 0
+    weight, weight_without_symbol = ENDPOINT_WEIGHTS[path]
+    return weight if "symbol" in params else weight_without_symbol
+
+
+def orders_count(path, method="GET"):
+    return ORDERS_COUNT.get(path, 0) if method == "POST" else 0
+
+
+class RateLimit:
+    def __init__(self, rate_limit_type, interval, interval_num, limit):
+        self.rate_limit_type = rate_limit_type
+        self.interval = interval
+        self.interval_num = interval_num
+        self.limit = limit
+        self.window = INTERVAL_SECONDS[interval] * interval_num
+        self.window_start = 0
+        self.used = 0
+        # e.g. X-MBX-USED-WEIGHT-1M or X-MBX-ORDER-COUNT-10S
+        prefix = {"REQUEST_WEIGHT": "X-MBX-USED-WEIGHT", "ORDERS": "X-MBX-ORDER-COUNT"}
+        self.header = (
+            f"{prefix[rate_limit_type]}-{interval_num}{interval[0]}"
+            if rate_limit_type in prefix
+            else None
+        )
+
+    def _roll(self, now):
+        # Binance uses fixed windows aligned on the clock
+        window_start = now - now % self.window
+        if window_start != self.window_start:
+            self.window_start = window_start
+            self.used = 0
+
+    def delay(self, cost, now):
+        self._roll(now)
+        if not cost or not self.used or self.used + cost <= self.limit:
+            return 0
+        return self.window_start + self.window - now
+
+    def consume(self, cost, now):
+        self._roll(now)
+        self.used += cost
+
+    def sync(self, used, now):
+        self._roll(now)
+        # other processes sharing the IP can only make the real count higher
+        self.used = max(self.used, used)
+
+    def __repr__(self):
+        return f"RateLimit({self.rate_limit_type}, {self.interval_num} {self.interval}, {self.used}/{self.limit})"
+
+
+class RateLimiter:
+    """
+    Delays the queries instead of letting Binance reject them. max_wait (in
+    seconds) cancels the queries which would have to wait longer than that.
+    """
+
+    def __init__(self, rate_limits=None, max_wait=None):
+        self.max_wait = max_wait
+        self.blocked_until = 0
+        self.configure(rate_limits or DEFAULT_RATE_LIMITS)
+
+    def configure(self, rate_limits):
+        self.limits = [
+            RateLimit(
+                limit["rateLimitType"],
+                limit["interval"],
+                limit["intervalNum"],
+                limit["limit"],
+            )
+            for limit in rate_limits
+        ]
+
+    def _costs(self, weight, orders):
+        return {"REQUEST_WEIGHT": weight, "ORDERS": orders, "RAW_REQUESTS": 1}
+
+    async def acquire(self, weight=1, orders=0):
+        costs = self._costs(weight, orders)
+        while True:
+            now = time.time()
+            delay = max(
+                [self.blocked_until - now]
+                + [
+                    limit.delay(costs.get(limit.rate_limit_type, 0), now)
+                    for limit in self.limits
+                ]
+            )
+            if delay <= 0:
+                for limit in self.limits:
+                    limit.consume(costs.get(limit.rate_limit_type, 0), now)
+                return
+            if self.max_wait is not None and delay > self.max_wait:
+                raise QueryCanceled(
+                    "Rate limit reached, to avoid an IP ban, this query has been automatically cancelled"
+                )
+            await asyncio.sleep(delay)
+
+    def update(self, headers):
+        now = time.time()
+        for limit in self.limits:
+            if limit.header and limit.header in headers:
+                limit.sync(int(headers[limit.header]), now)
+
+    def block(self, retry_after):
+        self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+
+    def usage(self):
+        return {
+            f"{limit.rate_limit_type}_{limit.interval_num}{limit.interval[0]}": limit.used
+            for limit in self.limits
+        }
@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+from urllib.parse import quote
+
+
+class HmacSigner:
+    """
+    HMAC SHA256 signatures: the key is hashed into the inner and outer states
+    once, every signature only copies them.
+    """
+
+    def __init__(self, api_secret):
+        self._hmac = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, payload):
+        signature = self._hmac.copy()
+        signature.update(payload.encode("utf-8"))
+        return signature.hexdigest()
+
+
+class _PrivateKeySigner:
+    # https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#signed-endpoint-security
+    def __init__(self, private_key, password=None):
+        try:
+            from cryptography.hazmat.primitives import serialization
+        except ImportError:
+            raise ImportError(
+                "RSA and Ed25519 keys require cryptography (pip install cryptography)."
+            )
+        if isinstance(private_key, str):
+            private_key = private_key.encode("utf-8")
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        self._key = serialization.load_pem_private_key(private_key, password)
+
+    @classmethod
+    def from_file(cls, path, password=None):
+        with open(path, "rb") as file:
+            return cls(file.read(), password)
+
+    def sign(self, payload):
+        # base64 signatures contain "+", "/" and "=" which must be percent-encoded
+        signature = base64.b64encode(self._sign(payload.encode("utf-8")))
+        return quote(signature.decode("ascii"), safe="")
+
+
+class Ed25519Signer(_PrivateKeySigner):
+    def _sign(self, payload):
+        return self._key.sign(payload)
+
+
+class RsaSigner(_PrivateKeySigner):
+    def __init__(self, private_key, password=None):
+        super().__init__(private_key, password)
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        self._padding = padding.PKCS1v15()
+        self._hash = hashes.SHA256()
+
+    def _sign(self, payload):
+        return self._key.sign(payload, self._padding, self._hash)
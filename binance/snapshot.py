@@ -0,0 +1,52 @@
+import marshal
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+# magic, snapshot format version, marshal version, save time
+HEADER = struct.Struct("<6sHHd")
+MAGIC = b"BPYEXI"
+VERSION = 1
+
+
+def save_exchange_info(path, infos):
+    """
+    Writes the exchange infos as a compressed marshal snapshot. The file is
+    replaced atomically so that other processes never read a partial one.
+    """
+    header = HEADER.pack(MAGIC, VERSION, marshal.version, time.time())
+    payload = zlib.compress(marshal.dumps(infos), 1)
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header + payload)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def load_exchange_info(path, max_age=None):
+    """
+    Returns (exchange infos, save time) or None when the snapshot is missing,
+    older than max_age seconds or written by an incompatible version.
+    """
+    try:
+        with open(path, "rb") as file:
+            content = file.read()
+    except FileNotFoundError:
+        return None
+    if len(content) < HEADER.size:
+        return None
+    magic, version, marshal_version, saved_at = HEADER.unpack_from(content)
+    if (magic, version, marshal_version) != (MAGIC, VERSION, marshal.version):
+        return None
+    if max_age is not None and time.time() - saved_at > max_age:
+        return None
+    try:
+        return marshal.loads(zlib.decompress(content[HEADER.size :])), saved_at
+    except (zlib.error, ValueError, EOFError, TypeError):
+        return None
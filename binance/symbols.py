@@ -0,0 +1,219 @@
+import sys
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# exchange infos keys of a symbol and the matching SymbolInfo attributes
+FIELDS = {
+    "symbol": "symbol",
+    "status": "status",
+    "baseAsset": "base_asset",
+    "baseAssetPrecision": "base_asset_precision",
+    "quoteAsset": "quote_asset",
+    "quotePrecision": "quote_precision",
+    "quoteAssetPrecision": "quote_asset_precision",
+    "orderTypes": "order_types",
+    "icebergAllowed": "iceberg_allowed",
+    "ocoAllowed": "oco_allowed",
+    "isSpotTradingAllowed": "is_spot_trading_allowed",
+    "isMarginTradingAllowed": "is_margin_trading_allowed",
+    "permissions": "permissions",
+    "filters": "filters",
+}
+
+
+def _share(value, shared):
+    """
+    Returns (immutable value, hashable key): lists become tuples and dicts
+    read-only mappings, and equal values return the same object from shared,
+    so that the symbols with the same filters or permissions share them.
+    """
+    if isinstance(value, str):
+        value = sys.intern(value)
+        return value, value
+    if isinstance(value, list):
+        items = [_share(item, shared) for item in value]
+        key = ("list",) + tuple(item_key for _, item_key in items)
+        if key not in shared:
+            shared[key] = tuple(item for item, _ in items)
+        return shared[key], key
+    if isinstance(value, dict):
+        items = [(sys.intern(k),) + _share(v, shared) for k, v in value.items()]
+        key = ("dict",) + tuple((k, item_key) for k, _, item_key in items)
+        if key not in shared:
+            shared[key] = MappingProxyType({k: item for k, item, _ in items})
+        return shared[key], key
+    # the type tells 1 from True
+    return value, (type(value), value)
+
+
+class SymbolInfo(Mapping):
+    """
+    Exchange infos of a symbol. The usual fields are attributes, the other ones
+    are kept in extra. It can still be read like the original dict, e.g.
+    symbol_info["baseAsset"], and its filters are indexed by filter type.
+    Unlike the original dict it is read-only: lists are tuples, dicts are
+    read-only mappings, and they are shared between the symbols.
+    """
+
+    __slots__ = tuple(FIELDS.values()) + ("extra",)
+
+    def __init__(self, symbol_infos, shared=None):
+        shared = {} if shared is None else shared
+        extra = {}
+        for key, value in symbol_infos.items():
+            attribute = FIELDS.get(key)
+            if attribute is None:
+                extra[key] = value
+                continue
+            if key == "filters":
+                value = {
+                    symbol_filter["filterType"]: {
+                        k: v for k, v in symbol_filter.items() if k != "filterType"
+                    }
+                    for symbol_filter in value
+                }
+            setattr(self, attribute, _share(value, shared)[0])
+        self.extra = _share(extra, shared)[0]
+        if "permissionSets" in self.extra and not getattr(self, "permissions", None):
+            # recent exchange infos give sets of permissions instead
+            permissions = {
+                sys.intern(permission)
+                for permission_set in self.extra["permissionSets"]
+                for permission in permission_set
+            }
+            self.permissions = _share(sorted(permissions), shared)[0]
+
+    def __getitem__(self, key):
+        attribute = FIELDS.get(key)
+        if attribute is not None:
+            try:
+                return getattr(self, attribute)
+            except AttributeError:
+                raise KeyError(key)
+        return self.extra[key]
+
+    def __iter__(self):
+        for key, attribute in FIELDS.items():
+            if hasattr(self, attribute):
+                yield key
+        yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"SymbolInfo({self.symbol})"
+
+
+class SymbolTable(Mapping):
+    """
+    The symbols of the exchange infos by name, with precomputed indexes
+    (frozensets of symbol names) by base asset, quote asset, status, order type
+    and permission, and a graph of the assets which can be traded for each
+    other (by TRADING symbols).
+    """
+
+    def __init__(self, symbols_infos):
+        self._symbols = {}
+        by_base_asset, by_quote_asset, by_status = {}, {}, {}
+        by_order_type, by_permission = {}, {}
+        self.graph = {}
+        shared = {}
+        for symbol_infos in symbols_infos:
+            info = SymbolInfo(symbol_infos, shared)
+            name = info.symbol
+            self._symbols[name] = info
+            by_base_asset.setdefault(info.base_asset, set()).add(name)
+            by_quote_asset.setdefault(info.quote_asset, set()).add(name)
+            by_status.setdefault(info.status, set()).add(name)
+            for order_type in getattr(info, "order_types", ()):
+                by_order_type.setdefault(order_type, set()).add(name)
+            for permission in getattr(info, "permissions", ()):
+                by_permission.setdefault(permission, set()).add(name)
+            if info.status == "TRADING":
+                self.graph.setdefault(info.base_asset, {})[info.quote_asset] = name
+                self.graph.setdefault(info.quote_asset, {})[info.base_asset] = name
+
+        def freeze(index):
+            return {key: frozenset(names) for key, names in index.items()}
+
+        self.by_base_asset = freeze(by_base_asset)
+        self.by_quote_asset = freeze(by_quote_asset)
+        self.by_status = freeze(by_status)
+        self.by_order_type = freeze(by_order_type)
+        self.by_permission = freeze(by_permission)
+
+    def __getitem__(self, symbol):
+        return self._symbols[symbol]
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._symbols
+
+    def select(
+        self,
+        base_asset=None,
+        quote_asset=None,
+        status=None,
+        order_type=None,
+        permission=None,
+    ):
+        # names of the symbols matching all the given criteria
+        empty = frozenset()
+        criteria = [
+            index.get(value, empty)
+            for index, value in (
+                (self.by_base_asset, base_asset),
+                (self.by_quote_asset, quote_asset),
+                (self.by_status, status),
+                (self.by_order_type, order_type),
+                (self.by_permission, permission),
+            )
+            if value is not None
+        ]
+        if not criteria:
+            return frozenset(self._symbols)
+        return frozenset.intersection(*sorted(criteria, key=len))
+
+    def with_asset(self, asset):
+        # symbols in which the asset is the base or the quote asset
+        return self.by_base_asset.get(asset, frozenset()) | self.by_quote_asset.get(
+            asset, frozenset()
+        )
+
+    def conversion_path(self, from_asset, to_asset):
+        """
+        Shortest list of (symbol, side) trades converting from_asset into
+        to_asset through TRADING symbols, None if there is none.
+        """
+        if from_asset == to_asset:
+            return []
+        previous = {from_asset: None}
+        queue = deque([from_asset])
+        while queue:
+            asset = queue.popleft()
+            for neighbour in self.graph.get(asset, ()):
+                if neighbour in previous:
+                    continue
+                previous[neighbour] = asset
+                if neighbour == to_asset:
+                    return self._path(previous, to_asset)
+                queue.append(neighbour)
+        return None
+
+    def _path(self, previous, asset):
+        path = []
+        while previous[asset] is not None:
+            source = previous[asset]
+            symbol = self.graph[source][asset]
+            # selling the base asset gives the quote asset
+            side = "SELL" if self._symbols[symbol].base_asset == source else "BUY"
+            path.append((symbol, side))
+            asset = source
+        return path[::-1]
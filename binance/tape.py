@@ -0,0 +1,204 @@
+import asyncio
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+class TradeRing:
+    """
+    Fixed capacity ring buffer of the aggregate trades of a symbol, stored in
+    typed arrays (33 bytes per trade). Appending is O(1) and window queries
+    are vectorized.
+    """
+
+    def __init__(self, capacity):
+        if np is None:
+            raise ImportError("The trade tape requires numpy (pip install numpy).")
+        self.capacity = capacity
+        self.count = 0
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._quantity = np.zeros(capacity, dtype=np.float64)
+        self._time = np.zeros(capacity, dtype=np.int64)
+        self._id = np.zeros(capacity, dtype=np.int64)
+        # True when the taker bought (the buyer is not the maker)
+        self._taker_buy = np.zeros(capacity, dtype=np.bool_)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def last_id(self):
+        return int(self._id[(self.count - 1) % self.capacity]) if self.count else None
+
+    def append(self, trade_id, price, quantity, time, taker_buy):
+        index = self.count % self.capacity
+        self._price[index] = price
+        self._quantity[index] = quantity
+        self._time[index] = time
+        self._id[index] = trade_id
+        self._taker_buy[index] = taker_buy
+        self.count += 1
+
+    def _segments(self):
+        # the kept trades, oldest first, are in one or two slices of the arrays
+        first = (self.count - len(self)) % self.capacity
+        if not first:
+            return [slice(0, len(self))]
+        return [slice(first, self.capacity), slice(0, first)]
+
+    def window(self, milliseconds=None, now=None):
+        """
+        Returns the (price, quantity, time, id, taker_buy) arrays of the trades
+        of the last milliseconds before now (defaults to the last trade time),
+        or of all the kept trades. The arrays are views, valid until the next
+        append, unless the trades wrap around the end of the ring: then they
+        are copies.
+        """
+        segments = self._segments()
+        if milliseconds is not None and self.count:
+            if now is None:
+                now = self._time[(self.count - 1) % self.capacity]
+            threshold = now - milliseconds
+            if len(segments) == 2 and self._time[self.capacity - 1] <= threshold:
+                segments = segments[1:]
+            first = segments[0]
+            start = first.start + int(
+                np.searchsorted(self._time[first], threshold, side="right")
+            )
+            segments[0] = slice(start, first.stop)
+        return tuple(
+            array[segments[0]]
+            if len(segments) == 1
+            else np.concatenate([array[segment] for segment in segments])
+            for array in (
+                self._price,
+                self._quantity,
+                self._time,
+                self._id,
+                self._taker_buy,
+            )
+        )
+
+    def volume(self, milliseconds=None, now=None):
+        return float(self.window(milliseconds, now)[1].sum())
+
+    def vwap(self, milliseconds=None, now=None):
+        price, quantity = self.window(milliseconds, now)[:2]
+        volume = quantity.sum()
+        return float(np.dot(price, quantity) / volume) if volume else None
+
+    def imbalance(self, milliseconds=None, now=None):
+        # (taker buy volume - taker sell volume) / volume, between -1 and 1
+        _, quantity, _, _, taker_buy = self.window(milliseconds, now)
+        volume = quantity.sum()
+        if not volume:
+            return None
+        bought = quantity[taker_buy].sum()
+        return float((2 * bought - volume) / volume)
+
+
+class TradeTape:
+    """
+    Keeps the latest aggregate trades of every symbol in a TradeRing, fed by
+    the @aggTrade streams. After a reconnection, the missed trades are fetched
+    from /api/v3/aggTrades by id before the live ones, so the tape has no gap.
+    Every ring keeps the last capacity trades of its symbol (330 KB with the
+    default), size it from the trade rate and the longest window queried.
+    The rings are kept after stop(), the trades missed meanwhile are fetched
+    when the tape is started again.
+    """
+
+    def __init__(self, client, capacity=10000):
+        self.client = client
+        self.capacity = capacity
+        self.rings = {}
+        self._started = set()
+        self._buffers = {}
+        self._gap_fills = {}
+
+    def __getitem__(self, symbol):
+        return self.rings[symbol.upper()]
+
+    def _stream(self, symbol):
+        return f"{symbol.lower()}@aggTrade"
+
+    def start(self, symbols):
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol in self._started:
+                continue
+            self._started.add(symbol)
+            if symbol not in self.rings:
+                self.rings[symbol] = TradeRing(self.capacity)
+            self.client.events.register_event(self._handle_trade, self._stream(symbol))
+            if self.rings[symbol].count:
+                self._start_gap_fill(symbol, self.rings[symbol])
+        if self._handle_gap not in self.client.events.gap_handlers:
+            self.client.events.register_gap_listener(self._handle_gap)
+
+    def stop(self):
+        for symbol in self._started:
+            self.client.events.unregister(self._handle_trade, self._stream(symbol))
+        self._started = set()
+        self.client.events.unregister_gap_listener(self._handle_gap)
+        for gap_fill in self._gap_fills.values():
+            gap_fill.cancel()
+        self._gap_fills = {}
+        self._buffers = {}
+
+    async def _handle_trade(self, event):
+        symbol = event.symbol
+        buffer = self._buffers.get(symbol)
+        if buffer is not None:
+            buffer.append(event)
+            return
+        self._append(self.rings[symbol], event)
+
+    def _append(self, ring, event):
+        if ring.count and event.aggregated_trade_id <= ring.last_id:
+            return
+        ring.append(
+            event.aggregated_trade_id,
+            float(event.price),
+            float(event.quantity),
+            event.trade_time,
+            not event.buyer_is_marker,
+        )
+
+    async def _handle_gap(self, gap):
+        for symbol, ring in self.rings.items():
+            if self._stream(symbol) in gap.streams and symbol not in self._buffers:
+                if ring.count:
+                    self._start_gap_fill(symbol, ring)
+
+    def _start_gap_fill(self, symbol, ring):
+        self._buffers[symbol] = []
+        self._gap_fills[symbol] = asyncio.ensure_future(self._fill_gap(symbol, ring))
+
+    async def _fill_gap(self, symbol, ring):
+        # live trades are buffered meanwhile and appended afterwards
+        try:
+            async for trade in self.client.iter_aggregate_trades(
+                symbol, from_id=ring.last_id + 1
+            ):
+                buffer = self._buffers[symbol]
+                if buffer and trade["a"] >= buffer[0].aggregated_trade_id:
+                    break
+                ring.append(
+                    trade["a"],
+                    float(trade["p"]),
+                    float(trade["q"]),
+                    trade["T"],
+                    not trade["m"],
+                )
+        except Exception:
+            logging.exception(f"Could not fetch the missed {symbol} trades")
+        finally:
+            # unless the tape has been stopped (or restarted) meanwhile
+            if self._gap_fills.get(symbol) is asyncio.current_task():
+                for event in self._buffers.pop(symbol):
+                    self._append(ring, event)
+                del self._gap_fills[symbol]
@@ -0,0 +1,118 @@
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from .events import Handlers
+
+# column -> payload key, as described here:
+# https://github.com/binance/binance-spot-api-docs/blob/master/web-socket-streams.md#all-market-tickers-stream
+TICKER_COLUMNS = {
+    "last": "c",
+    "open": "o",
+    "high": "h",
+    "low": "l",
+    "volume": "v",
+    "quote_volume": "q",
+    "price_change": "p",
+    "price_change_percent": "P",
+    "weighted_average": "w",
+    "last_quantity": "Q",
+    "bid": "b",
+    "bid_quantity": "B",
+    "ask": "a",
+    "ask_quantity": "A",
+}
+MINI_TICKER_COLUMNS = {
+    "last": "c",
+    "open": "o",
+    "high": "h",
+    "low": "l",
+    "volume": "v",
+    "quote_volume": "q",
+}
+
+
+class TickerMatrix:
+    """
+    Latest tickers of every symbol from the !ticker@arr (or !miniTicker@arr)
+    stream, in a structured array with one row per symbol id (see ids). Every
+    message is decoded in one pass, without an event per ticker, then the
+    handlers are called once with the matrix. Columns missing from the stream
+    (e.g. bid and ask in the mini tickers) stay NaN.
+    """
+
+    def __init__(self, client, stream="!ticker@arr", capacity=4096):
+        if np is None:
+            raise ImportError("The ticker matrix requires numpy (pip install numpy).")
+        self.client = client
+        self.stream = stream
+        columns = MINI_TICKER_COLUMNS if "miniTicker" in stream else TICKER_COLUMNS
+        self.columns = tuple(TICKER_COLUMNS)
+        self.dtype = np.dtype(
+            [(column, np.float64) for column in self.columns]
+            + [("event_time", np.int64)]
+        )
+        # columns given by the stream and the getter of their payload values
+        self._received = tuple(columns)
+        self._values = itemgetter(*columns.values())
+        self.ids = {}
+        self.symbols = []
+        # symbol ids follow the loaded exchange infos, new symbols are appended
+        for symbol in getattr(client, "symbols", ()):
+            self._id(symbol)
+        self.matrix = self._empty(max(capacity, len(self.symbols)))
+        self.handlers = Handlers()
+        self.updated_at = None
+
+    def _empty(self, rows):
+        matrix = np.zeros(rows, dtype=self.dtype)
+        for column in self.columns:
+            matrix[column] = np.nan
+        return matrix
+
+    def _id(self, symbol):
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def start(self):
+        self.client.events.register_array_listener(self.update, self.stream)
+
+    def stop(self):
+        self.client.events.unregister_array_listener(self.stream)
+
+    def column(self, name):
+        # view of a column, indexed by symbol id
+        return self.matrix[name][: len(self.symbols)]
+
+    def row(self, symbol):
+        return self.matrix[self.ids[symbol]]
+
+    def rows(self, symbols):
+        return self.matrix[[self.ids[symbol] for symbol in symbols]]
+
+    async def update(self, tickers):
+        if not tickers:
+            return
+        ids = np.fromiter(
+            map(self._id, map(itemgetter("s"), tickers)), np.intp, len(tickers)
+        )
+        if len(self.symbols) > len(self.matrix):
+            grown = self._empty(2 * len(self.symbols))
+            grown[: len(self.matrix)] = self.matrix
+            self.matrix = grown
+        # numpy parses all the decimal strings at once
+        values = np.array(list(map(self._values, tickers)), dtype=np.float64)
+        for position, column in enumerate(self._received):
+            self.matrix[column][ids] = values[:, position]
+        event_times = np.fromiter(
+            map(itemgetter("E"), tickers), np.int64, len(tickers)
+        )
+        self.matrix["event_time"][ids] = event_times
+        self.updated_at = int(event_times.max())
+        await self.handlers(self)
@@ -1,11 +1,31 @@
 from . import __version__
+from .errors import BinanceError, BinancePyError
+from .events import Handlers, StreamGap
+from abc import ABC, abstractmethod
 import aiohttp
 import asyncio
+import inspect
+import itertools
 import logging
-import json
+import math
+import random
+import time
 
+CONNECTION_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError, BinancePyError)
+
+
+class EventsDataStream(ABC):
+    """
+    Keeps a websocket connected: reconnects with a jittered exponential
+    backoff, replaces the connection before Binance's 24h disconnection and
+    fires a StreamGap event when some messages may have been missed.
+    """
+
+    heartbeat = 30  # seconds without pong before considering the connection stale
+    max_connection_age = 23 * 60 * 60  # Binance disconnects after 24 hours
+    backoff_base = 0.5
+    backoff_max = 60
 
-class EventsDataStream:
     def __init__(self, client, endpoint, user_agent):
         self.client = client
         self.endpoint = endpoint
@@ -13,104 +33,450 @@ class EventsDataStream:
             self.user_agent = user_agent
         else:
             self.user_agent = f"binance.py (https://git.io/binance.py, {__version__})"
-    
+        self.loads = client.loads
+        self.ws_options = {"heartbeat": self.heartbeat}
+        # recent aiohttp versions can skip the str decoding of text frames
+        if client.loads_bytes and "decode_text" in inspect.signature(
+            aiohttp.ClientSession.ws_connect
+        ).parameters:
+            self.ws_options["decode_text"] = False
+        # decoding can be moved to an executor (see MarketEventsDataStream)
+        self.decode_executor = None
+        self.web_socket = None
+        self.closed = False
+        self._next_web_socket = None
+        self._rotation = None
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1)
+
+    @abstractmethod
+    async def _connect(self, session):
+        # opens and returns the websocket
+        pass
+
+    @abstractmethod
+    def _streams(self):
+        # returns the streams carried by the websocket (reported by StreamGap)
+        pass
+
+    async def start(self):
+        self.closed = False
+        session = self.client.session
+        attempt = 0
+        disconnected_at = None
+        while not self.closed:
+            if self._next_web_socket:
+                # rotated before the 24h limit, nothing has been missed
+                self.web_socket, self._next_web_socket = self._next_web_socket, None
+            else:
+                try:
+                    self.web_socket = await self._connect(session)
+                except CONNECTION_ERRORS as e:
+                    disconnected_at = disconnected_at or time.time()
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    logging.error(
+                        f"Websocket connection failed ({e}), retrying in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                attempt = 0
+                if disconnected_at:
+                    await self._fire_gap(disconnected_at)
+                    disconnected_at = None
+            self._rotation = asyncio.get_running_loop().call_later(
+                self.max_connection_age,
+                lambda: asyncio.ensure_future(self._rotate(session)),
+            )
+            await self._handle_messages(self.web_socket)
+            self._rotation.cancel()
+            if not self.closed and not self._next_web_socket:
+                disconnected_at = time.time()
+                logging.error("The websocket has been closed, reconnecting...")
+
+    async def stop(self):
+        self.closed = True
+        if self._rotation:
+            self._rotation.cancel()
+        if self.web_socket:
+            await self.web_socket.close()
+
+    async def _rotate(self, session):
+        try:
+            self._next_web_socket = await self._connect(session)
+        except CONNECTION_ERRORS:
+            logging.exception("Could not open the replacement websocket")
+            return
+        await self.web_socket.close()
+
+    async def _fire_gap(self, disconnected_at):
+        gap = StreamGap(self._streams(), disconnected_at, time.time())
+        logging.warning(f"Reconnected, events may have been missed: {gap}")
+        # a failing listener must neither stop the others nor the reconnections
+        for listener in list(self.client.events.gap_handlers):
+            try:
+                await Handlers((listener,))(gap)
+            except Exception:
+                logging.exception(f"Gap listener {listener} raised an exception")
+
     async def _handle_messages(self, web_socket):
+        loop = asyncio.get_running_loop()
         while True:
             msg = await web_socket.receive()
-            if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSE):
-                logging.error(
-                    "Trying to receive something while the websocket is closed! Trying to reconnect."
-                )
-                asyncio.ensure_future(self.start())
+            if msg.type in (
+                aiohttp.WSMsgType.CLOSED,
+                aiohttp.WSMsgType.CLOSE,
+                aiohttp.WSMsgType.CLOSING,
+            ):
                 break
             elif msg.type is aiohttp.WSMsgType.ERROR:
                 logging.error(
-                    f"Something went wrong with the websocket, reconnecting..."
+                    f"Something went wrong with the websocket: {web_socket.exception()}"
                 )
-                asyncio.ensure_future(self.start())
                 break
-            elif msg.type == aiohttp.WSMsgType.CLOSING:
-                logging.info(
-                    "_handle_messages loop is stopped"
-                )
-                break
-            await self._handle_event(json.loads(msg.data))
-    
+            # a failing message must neither stop the next ones nor the reconnections
+            try:
+                await self._handle_message(loop, msg.data)
+            except Exception:
+                logging.exception(f"Could not handle the message {msg.data!r}")
 
-class MarketEventsDataStream(EventsDataStream):
-    def __init__(self, client, endpoint, user_agent):
-        super().__init__(client, endpoint, user_agent)
-        self.web_socket = None
+    async def _handle_message(self, loop, data):
+        metrics = self.client.metrics
+        if metrics:
+            decoding_started_at = time.perf_counter()
+        if self.decode_executor:
+            content = await loop.run_in_executor(self.decode_executor, self.loads, data)
+        else:
+            content = self.loads(data)
+        if metrics:
+            metrics.decode_duration.observe(time.perf_counter() - decoding_started_at)
+            self._measure(metrics, data, content)
+        await self._handle_event(content)
+
+    @abstractmethod
+    def _stream_of(self, content):
+        # returns the stream name and the event(s) of a message
+        pass
+
+    def _measure(self, metrics, data, content):
+        stream, event = self._stream_of(content)
+        if stream is None:
+            return  # answer to a request
+        labels = (stream,)
+        metrics.messages.inc(labels)
+        metrics.received_bytes.inc(labels, len(data))
+        if isinstance(event, list):
+            event = event[0] if event else None
+        if event and "E" in event:
+            # the exchange event time is compared with the estimated server time
+            lag = (self.client.clock.now() - event["E"]) / 1000
+            metrics.event_lag.observe(lag, labels)
+
+
+# expected messages per second of a stream, used to balance the streams between
+# the connections (the all market streams are weighted by their payload size)
+STREAM_RATES = {
+    "trade": 10,
+    "aggTrade": 5,
+    "bookTicker": 20,
+    "depth": 1,
+    "depth@100ms": 10,
+    "ticker": 1,
+    "miniTicker": 1,
+    "kline": 0.5,
+    "!ticker@arr": 100,
+    "!miniTicker@arr": 50,
+    "!bookTicker": 500,
+}
+
+
+def expected_rate(stream):
+    if stream in STREAM_RATES:
+        return STREAM_RATES[stream]
+    # the streams without a type (e.g. a listen key) get the default rate
+    stream_type = stream.partition("@")[2]
+    if stream_type.startswith("kline_"):
+        stream_type = "kline"
+    elif stream_type.startswith("depth"):
+        stream_type = "depth@100ms" if stream_type.endswith("@100ms") else "depth"
+    return STREAM_RATES.get(stream_type, 1)
+
+
+def shard_streams(streams, max_streams_per_connection, connections=None):
+    # greedy balancing: the busiest streams first, each on the least loaded connection
+    connections = max(
+        connections or 1, math.ceil(len(streams) / max_streams_per_connection)
+    )
+    shards = [[] for _ in range(connections)]
+    loads = [0] * connections
+    for stream in sorted(streams, key=expected_rate, reverse=True):
+        index = min(
+            (i for i in range(connections) if len(shards[i]) < max_streams_per_connection),
+            key=loads.__getitem__,
+        )
+        shards[index].append(stream)
+        loads[index] += expected_rate(stream)
+    return [shard for shard in shards if shard]
+
+
+class MarketStreamConnection(EventsDataStream):
+    # one combined stream connection, its events are handled by the MarketEventsDataStream
+    def __init__(self, market_stream, streams):
+        super().__init__(
+            market_stream.client, market_stream.endpoint, market_stream.user_agent
+        )
+        self.market_stream = market_stream
+        self.streams = streams
+        self.decode_executor = market_stream.decode_executor
+
+    def _streams(self):
+        return tuple(self.streams)
+
+    async def _connect(self, session):
+        combined_streams = "/".join(self.streams)
+        if self.client.proxy:
+            return await session.ws_connect(
+                f"{self.endpoint}/stream?streams={combined_streams}",
+                proxy=self.client.proxy,
+                **self.ws_options,
+            )
+        return await session.ws_connect(
+            f"{self.endpoint}/stream?streams={combined_streams}", **self.ws_options,
+        )
+
+    async def send_request(self, method, params=None):
+        # see: https://github.com/binance/binance-spot-api-docs/blob/master/web-socket-streams.md#live-subscribingunsubscribing-to-streams
+        request_id, response = self.market_stream._new_request()
+        request = {"method": method, "id": request_id}
+        if params is not None:
+            request["params"] = params
+        await self.web_socket.send_json(request)
+        return await asyncio.wait_for(response, self.market_stream.request_timeout)
+
+    def _stream_of(self, content):
+        return content.get("stream"), content.get("data")
+
+    async def _handle_event(self, content):
+        if "id" in content and "stream" not in content:
+            self.market_stream._handle_response(content)
+        else:
+            await self.market_stream._handle_event(content)
+
+
+class MarketEventsDataStream:
+    """
+    Spreads the registered streams over several combined stream connections
+    (Binance accepts up to 1024 streams per connection) and merges their events
+    into one dispatch pipeline. decode_executor optionally decodes the frames
+    in an executor instead of the event loop.
+    """
+
+    def __init__(
+        self,
+        client,
+        endpoint,
+        user_agent,
+        max_streams_per_connection=1024,
+        connections=None,
+        decode_executor=None,
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.user_agent = user_agent
+        self.max_streams_per_connection = max_streams_per_connection
+        self.connections_count = connections
+        self.decode_executor = decode_executor
+        self.connections = []
+        self.request_timeout = 10
+        self._request_ids = itertools.count(1)
+        self._requests = {}
+        self._to_subscribe = set()
+        self._to_unsubscribe = set()
+        self._flush_scheduled = False
 
     async def stop(self):
         """
         Stop market data stream
         """
-        # print('MarketEventsDataStream.stop()')
-        await self.web_socket.close()
+        if self.client.events.streams_observer == self._streams_changed:
+            self.client.events.streams_observer = None
+        await asyncio.gather(*(connection.stop() for connection in self.connections))
 
     async def start(self):
-        async with aiohttp.ClientSession() as session:
-            combined_streams = "/".join(self.client.events.registered_streams)
-            if self.client.proxy:
-                self.web_socket = await session.ws_connect(
-                    f"{self.endpoint}/stream?streams={combined_streams}",
-                    proxy=self.client.proxy,
-                )
-            else:
-                self.web_socket = await session.ws_connect(
-                    f"{self.endpoint}/stream?streams={combined_streams}"
-                )
-            await self._handle_messages(self.web_socket)
+        self.connections = [
+            MarketStreamConnection(self, streams)
+            for streams in shard_streams(
+                list(self.client.events.registered_streams),
+                self.max_streams_per_connection,
+                self.connections_count,
+            )
+        ]
+        self.client.events.streams_observer = self._streams_changed
+        await asyncio.gather(*(connection.start() for connection in self.connections))
+
+    # LIVE SUBSCRIPTIONS
+
+    def _new_request(self):
+        request_id = next(self._request_ids)
+        response = asyncio.get_running_loop().create_future()
+        response.add_done_callback(lambda _: self._requests.pop(request_id, None))
+        self._requests[request_id] = response
+        return request_id, response
+
+    def _handle_response(self, content):
+        response = self._requests.get(content["id"])
+        if response is None or response.done():
+            return
+        if "error" in content:
+            response.set_exception(BinanceError(content["error"].get("msg")))
+        else:
+            response.set_result(content.get("result"))
+
+    def _streams_changed(self, added, removed):
+        # changes made during the same loop iteration are sent as one request
+        for stream in added:
+            self._to_unsubscribe.discard(stream)
+            self._to_subscribe.add(stream)
+        for stream in removed:
+            self._to_subscribe.discard(stream)
+            self._to_unsubscribe.add(stream)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(
+                lambda: asyncio.ensure_future(self._flush())
+            )
+
+    async def _flush(self):
+        self._flush_scheduled = False
+        to_subscribe, self._to_subscribe = self._to_subscribe, set()
+        to_unsubscribe, self._to_unsubscribe = self._to_unsubscribe, set()
+        try:
+            if to_unsubscribe:
+                await self.unsubscribe(to_unsubscribe)
+            if to_subscribe:
+                await self.subscribe(to_subscribe)
+        except Exception:
+            logging.exception("Could not update the market streams subscriptions")
+
+    async def subscribe(self, streams):
+        changes = {}
+        new_streams = []
+        for stream in streams:
+            candidates = [
+                connection
+                for connection in self.connections
+                if len(connection.streams) < self.max_streams_per_connection
+            ]
+            if not candidates:
+                new_streams.append(stream)
+                continue
+            connection = min(
+                candidates,
+                key=lambda connection: sum(map(expected_rate, connection.streams)),
+            )
+            connection.streams.append(stream)
+            changes.setdefault(connection, []).append(stream)
+        for streams in shard_streams(new_streams, self.max_streams_per_connection):
+            connection = MarketStreamConnection(self, streams)
+            self.connections.append(connection)
+            asyncio.ensure_future(connection.start())
+        await self._send_changes("SUBSCRIBE", changes)
+
+    async def unsubscribe(self, streams):
+        changes = {}
+        for connection in self.connections:
+            removed = [stream for stream in connection.streams if stream in streams]
+            for stream in removed:
+                connection.streams.remove(stream)
+            if removed:
+                changes[connection] = removed
+        await self._send_changes("UNSUBSCRIBE", changes)
+
+    async def _send_changes(self, method, changes):
+        # a connection which is not open yet will use its updated streams list
+        await asyncio.gather(
+            *(
+                connection.send_request(method, streams)
+                for connection, streams in changes.items()
+                if connection.web_socket and not connection.web_socket.closed
+            )
+        )
+
+    async def list_subscriptions(self):
+        subscriptions = await asyncio.gather(
+            *(
+                connection.send_request("LIST_SUBSCRIPTIONS")
+                for connection in self.connections
+                if connection.web_socket and not connection.web_socket.closed
+            )
+        )
+        return [stream for streams in subscriptions for stream in streams]
 
     async def _handle_event(self, content):
-        if "stream" in content:
-            stream_name = content["stream"]
-            content = content["data"]
+        stream_name = content["stream"]
+        content = content["data"]
         if isinstance(content, list):
-            for event_content in content:
-                event_content["stream"] = stream_name
-                await self.client.events.wrap_event(event_content).fire()
+            events = self.client.events
+            array_listener = events.array_listeners.get(stream_name)
+            if array_listener:
+                await array_listener(content)
+            if stream_name in events.routes:
+                for event_content in content:
+                    await events.dispatch(event_content, stream_name)
         else:
-            content["stream"] = stream_name
-            await self.client.events.wrap_event(content).fire()
+            await self.client.events.dispatch(content, stream_name)
 
 
 class UserEventsDataStream(EventsDataStream):
     def __init__(self, client, endpoint, user_agent):
         super().__init__(client, endpoint, user_agent)
-        self.web_socket = None
+        self.listen_key = None
+        self._keep_alive = None
 
     async def _heartbeat(
-        self, listen_key, interval=60 * 30
+        self, interval=60 * 30
     ):  # 30 minutes is recommended according to
         # https://github.com/binance-exchange/binance-official-api-docs/blob/master/user-data-stream.md#pingkeep-alive-a-listenkey
         while True:
             await asyncio.sleep(interval)
-            await self.client.keep_alive_listen_key(listen_key)
+            await self.client.keep_alive_listen_key(self.listen_key)
+
+    def _streams(self):
+        return ("user",)
 
     async def stop(self):
         """
         Stop user data stream
         """
-        # print('UserEventsDataStream.stop()')
-        if self.web_socket:
-            await self.web_socket.close()
+        if self._keep_alive:
+            self._keep_alive.cancel()
+        await super().stop()
 
     async def start(self):
-        async with aiohttp.ClientSession() as session:
-            listen_key = (await self.client.create_listen_key())["listenKey"]
-            if self.client.proxy:
-                self.web_socket = await session.ws_connect(
-                    f"{self.endpoint}/ws/{listen_key}"
-                )
-            else:
-                self.web_socket = await session.ws_connect(
-                    f"{self.endpoint}/ws/{listen_key}", proxy=self.client.proxy
-                )
-            asyncio.ensure_future(self._heartbeat(listen_key))
-            await self._handle_messages(self.web_socket)
+        self._keep_alive = asyncio.ensure_future(self._heartbeat())
+        try:
+            await super().start()
+        finally:
+            self._keep_alive.cancel()
+
+    async def _connect(self, session):
+        # a listen key is valid for 60 minutes without keep alive, so a new one
+        # is requested for every connection
+        self.listen_key = (await self.client.create_listen_key())["listenKey"]
+        if self.client.proxy:
+            return await session.ws_connect(
+                f"{self.endpoint}/ws/{self.listen_key}",
+                proxy=self.client.proxy,
+                **self.ws_options,
+            )
+        return await session.ws_connect(
+            f"{self.endpoint}/ws/{self.listen_key}", **self.ws_options
+        )
+
+    def _stream_of(self, content):
+        return "user", content
 
     async def _handle_event(self, content):
-        event = self.client.events.wrap_event(content)
-        await event.fire()
+        await self.client.events.dispatch(content)
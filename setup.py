@@ -24,6 +24,7 @@ setuptools.setup(
     url="https://git.io/binance.py",
     packages=setuptools.find_packages(),
     install_requires=required,
+    extras_require={"numpy": ["numpy"], "keys": ["cryptography"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,160 @@
+import sys, unittest, asyncio
+from decimal import Decimal
+
+sys.path.append("../")
+from binance.events import Events, StreamGap
+from binance.account import AccountState
+
+
+class FakeClient:
+    def __init__(self):
+        self.events = Events()
+        self.account = {
+            "updateTime": 100,
+            "balances": [{"asset": "BTC", "free": "1.5", "locked": "0.5"}],
+        }
+        self.open_orders = [
+            {
+                "symbol": "ETHBTC",
+                "orderId": 1,
+                "clientOrderId": "a",
+                "status": "NEW",
+                "updateTime": 100,
+            }
+        ]
+        self.fetches = 0
+
+    async def fetch_account_information(self):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return self.account
+
+    async def fetch_open_orders(self):
+        await asyncio.sleep(0)
+        return [dict(order) for order in self.open_orders]
+
+
+def order_update(order_id, status, execution_type="NEW", time=200, **fields):
+    data = {
+        "e": "executionReport",
+        "E": time,
+        "s": "ETHBTC",
+        "c": f"client{order_id}",
+        "C": "",
+        "S": "BUY",
+        "o": "LIMIT",
+        "f": "GTC",
+        "q": "1",
+        "p": "0.05",
+        "P": "0",
+        "F": "0",
+        "g": -1,
+        "x": execution_type,
+        "X": status,
+        "i": order_id,
+        "l": "0",
+        "z": "0",
+        "L": "0",
+        "n": "0",
+        "N": None,
+        "T": time,
+        "t": -1,
+        "w": True,
+        "m": False,
+        "O": time,
+        "Z": "0",
+        "Y": "0",
+        "Q": "0",
+    }
+    data.update(fields)
+    return data
+
+
+class TestAccountState(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = FakeClient()
+        self.state = AccountState(self.client)
+        await self.state.start()
+
+    async def asyncTearDown(self):
+        self.state.stop()
+
+    async def test_bootstrap(self):
+        self.assertEqual(self.state.order(1)["clientOrderId"], "a")
+        self.assertEqual(self.state.order(client_order_id="a")["orderId"], 1)
+        self.assertEqual(len(self.state.open_orders("ETHBTC")), 1)
+        self.assertEqual(self.state.balance("BTC")["free"], Decimal("1.5"))
+        self.assertEqual(self.state.balance("ETH")["free"], Decimal(0))
+
+    async def test_order_lifecycle(self):
+        events = self.client.events
+        await events.dispatch(order_update(2, "NEW"))
+        self.assertEqual(self.state.order(client_order_id="client2")["status"], "NEW")
+        await events.dispatch(
+            order_update(2, "FILLED", "TRADE", time=300, l="1", L="0.05", t=7)
+        )
+        self.assertIsNone(self.state.order(2))
+        self.assertEqual(self.state.fills[-1]["id"], 7)
+        # cancellations carry the original client order id in "C"
+        await events.dispatch(
+            order_update(1, "CANCELED", "CANCELED", c="cancel", C="a")
+        )
+        self.assertEqual(self.state.open_orders(), [])
+
+    async def test_balances(self):
+        events = self.client.events
+        await events.dispatch(
+            {"e": "balanceUpdate", "E": 200, "a": "BTC", "d": "0.1", "T": 200}
+        )
+        self.assertEqual(self.state.balance("BTC")["free"], Decimal("1.6"))
+        position = {
+            "e": "outboundAccountPosition",
+            "E": 300,
+            "u": 300,
+            "B": [{"a": "BTC", "f": "2", "l": "0"}],
+        }
+        await events.dispatch(position)
+        self.assertEqual(self.state.balance("BTC")["free"], Decimal("2"))
+        # older than the current balances
+        await events.dispatch(dict(position, u=250, B=[{"a": "BTC", "f": "9", "l": "0"}]))
+        self.assertEqual(self.state.balance("BTC")["free"], Decimal("2"))
+
+    async def test_reconcile_on_gap(self):
+        self.client.open_orders = []
+        await self.client.events.gap_handlers(StreamGap(("user",), 0, 1))
+        await self.state._retry
+        self.assertEqual(self.client.fetches, 2)
+        self.assertEqual(self.state.open_orders(), [])
+
+    async def test_failed_reconciliation_is_retried(self):
+        fetch_account_information = self.client.fetch_account_information
+        failures = [asyncio.TimeoutError()]
+
+        async def flaky_fetch_account_information():
+            if failures:
+                raise failures.pop()
+            return await fetch_account_information()
+
+        self.client.fetch_account_information = flaky_fetch_account_information
+        self.state.retry_base = 0
+        self.client.open_orders = []
+        # the gap listener does not raise, the reconciliation is retried
+        await self.client.events.gap_handlers(StreamGap(("user",), 0, 1))
+        await self.state._retry
+        self.assertEqual(self.client.fetches, 2)
+        self.assertEqual(self.state.open_orders(), [])
+
+    async def test_overlapping_reconciliations_keep_events(self):
+        # an event received during the first reconciliation must survive the second
+        first = asyncio.ensure_future(self.state.reconcile())
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(self.state.reconcile())
+        await self.client.events.dispatch(
+            order_update(2, "FILLED", "TRADE", time=300, l="1", L="0.05", t=7)
+        )
+        await asyncio.gather(first, second)
+        self.assertEqual([fill["id"] for fill in self.state.fills], [7])
+
+
+if __name__ == "__main__":
+    unittest.main()
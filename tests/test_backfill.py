@@ -0,0 +1,76 @@
+import sys, unittest, tempfile, time
+
+sys.path.append("../")
+import binance
+from binance.backfill import KlineBackfiller, KlineCache, merge_ranges
+
+WEEK = 7 * 24 * 60 * 60 * 1000
+# the weekly klines open on Mondays, the epoch was a Thursday
+FIRST_MONDAY = -3 * 24 * 60 * 60 * 1000
+
+
+def kline(open_time, close="1.5"):
+    return [open_time, "1", "2", "0.5", close, "10", open_time + 59999, "15", 3, "4", "6", "0"]
+
+
+class TestKlineCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = KlineCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_merge_ranges(self):
+        self.assertEqual(merge_ranges([[5, 8], [0, 2], [2, 4]]), [[0, 4], [5, 8]])
+
+    def test_store_and_missing(self):
+        self.cache.store("ETHBTC", "1m", [kline(120000), kline(60000)], 60000, 180000)
+        self.cache.store("ETHBTC", "1m", [kline(300000)], 300000, 360000)
+        self.assertEqual(
+            self.cache.missing("ETHBTC", "1m", 0, 420000),
+            [(0, 60000), (180000, 300000), (360000, 420000)],
+        )
+        columns = self.cache.load("ETHBTC", "1m", 60000, 300000)
+        self.assertEqual(list(columns["open_time"]), [60000, 120000])
+        self.assertEqual(columns["close"][0], 1.5)
+
+    def test_freshest_kline_wins(self):
+        self.cache.store("ETHBTC", "1m", [kline(60000)], 60000, 120000)
+        self.cache.store("ETHBTC", "1m", [kline(60000, "2.5")], 60000, 120000)
+        self.assertEqual(list(self.cache.load("ETHBTC", "1m")["close"]), [2.5])
+
+
+class TestKlineBackfiller(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = KlineCache(self.directory.name)
+        self.client = binance.Client("key", "secret")
+
+        async def fetch_klines(symbol, interval, start_time, end_time, limit):
+            first = -((FIRST_MONDAY - start_time) // WEEK)
+            opens = (FIRST_MONDAY + i * WEEK for i in range(first, first + limit))
+            return [
+                [t, "1", "1", "1", "1", "1", t + WEEK - 1, "1", 1, "1", "1", "0"]
+                for t in opens
+                if start_time <= t <= end_time
+            ]
+
+        self.client.fetch_klines = fetch_klines
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.directory.cleanup()
+
+    async def test_open_kline_is_not_cached(self):
+        await KlineBackfiller(self.client, self.cache).backfill(["ETHBTC"], ["1w"], 0)
+        now = int(time.time() * 1000)
+        open_kline = FIRST_MONDAY + (now - FIRST_MONDAY) // WEEK * WEEK
+        open_times = self.cache.load("ETHBTC", "1w")["open_time"]
+        self.assertEqual(open_times[0], FIRST_MONDAY + WEEK)
+        self.assertEqual(open_times[-1], open_kline - WEEK)
+        self.assertEqual(self.cache.ranges("ETHBTC", "1w"), [[0, open_kline]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys, unittest
+from decimal import Decimal
+
+sys.path.append("../")
+from binance.events import Events, Handlers, TradeWrapper, KlineWrapper
+from binance.bars import TimeBars, VolumeBars, DollarBars
+
+
+def trade(time, price, quantity, symbol="ETHBTC"):
+    return TradeWrapper(
+        {"e": "trade", "s": symbol, "p": price, "q": quantity, "T": time}, Handlers()
+    )
+
+
+def kline(start, minutes, o, h, l, c, v, closed=True):
+    return KlineWrapper(
+        {
+            "e": "kline",
+            "s": "ETHBTC",
+            "k": {
+                "t": start,
+                "T": start + minutes * 60000 - 1,
+                "o": o,
+                "h": h,
+                "l": l,
+                "c": c,
+                "v": v,
+                "q": "0",
+                "n": 10,
+                "x": closed,
+            },
+        },
+        Handlers(),
+    )
+
+
+class TestBars(unittest.IsolatedAsyncioTestCase):
+    async def test_time_bars_from_trades(self):
+        bars = TimeBars("10s", max_bars=2)
+        closed = []
+        bars.handlers = Handlers([self._collect(closed)])
+        for time, price in ((1000, "1"), (5000, "3"), (9999, "2"), (10000, "4")):
+            await bars.on_trade(trade(time, price, "1"))
+        self.assertEqual(len(closed), 1)
+        bar = closed[0]
+        self.assertEqual((bar.open_time, bar.close_time), (0, 9999))
+        self.assertEqual(
+            (bar.open, bar.high, bar.low, bar.close, bar.volume, bar.trades),
+            (Decimal(1), Decimal(3), Decimal(1), Decimal(2), Decimal(3), 3),
+        )
+        # late trades are not merged in the current bar
+        await bars.on_trade(trade(500, "9", "1"))
+        self.assertEqual(bars.late, 1)
+        await bars.on_trade(trade(20000, "4", "1"))
+        await bars.on_trade(trade(30000, "4", "1"))
+        self.assertEqual(len(bars.bars["ETHBTC"]), 2)
+        await bars.close_expired(40000)
+        self.assertEqual(len(closed), 4)
+        self.assertEqual(bars.current, {})
+
+    async def test_klines_aggregation(self):
+        bars = TimeBars("5m")
+        closed = []
+        bars.handlers = Handlers([self._collect(closed)])
+        await bars.on_kline(kline(0, 1, "1", "2", "1", "2", "1", closed=False))
+        self.assertEqual(bars.current, {})
+        for minute in range(5):
+            price = str(minute + 1)
+            await bars.on_kline(
+                kline(minute * 60000, 1, price, price, "0.5", price, "2")
+            )
+        self.assertEqual(len(closed), 1)
+        bar = closed[0]
+        self.assertEqual(
+            (bar.open, bar.high, bar.low, bar.close), (1, 5, Decimal("0.5"), 5)
+        )
+        self.assertEqual((bar.volume, bar.trades), (10, 50))
+
+    async def test_volume_and_dollar_bars(self):
+        volume_bars = VolumeBars("2")
+        dollar_bars = DollarBars("80")
+        events = Events()
+        volume_bars.start(events, ["ethbtc@trade"])
+        dollar_bars.start(events, ["ethbtc@trade"])
+        trades = ((1, "10", "1"), (2, "20", "1.5"), (3, "50", "1"))
+        for time, price, quantity in trades:
+            await events.dispatch(
+                {"e": "trade", "s": "ETHBTC", "p": price, "q": quantity, "T": time},
+                "ethbtc@trade",
+            )
+        self.assertEqual(len(volume_bars.bars["ETHBTC"]), 1)
+        self.assertEqual(volume_bars.bars["ETHBTC"][0].volume, Decimal("2.5"))
+        self.assertEqual(dollar_bars.bars["ETHBTC"][0].close_time, 3)
+        volume_bars.stop()
+        dollar_bars.stop()
+        self.assertEqual(events.handlers.get("ethbtc@trade"), None)
+
+    def _collect(self, closed):
+        async def on_bar(bar):
+            closed.append(bar)
+
+        return on_bar
+
+
+if __name__ == "__main__":
+    unittest.main()
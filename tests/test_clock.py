@@ -0,0 +1,47 @@
+import sys, unittest, asyncio, time
+
+sys.path.append("../")
+import binance
+from binance.clock import ServerClock
+from binance.errors import BinanceError
+
+
+class TestServerClock(unittest.IsolatedAsyncioTestCase):
+    async def test_lowest_rtt_sample_wins(self):
+        delays = [0.05, 0.001, 0.03]
+
+        async def fetch_time():
+            # the server clock is 5 seconds ahead, answers are delayed on the way back
+            server_time = time.time() * 1000 + 5000
+            await asyncio.sleep(delays.pop(0))
+            return {"serverTime": server_time}
+
+        clock = ServerClock(fetch_time)
+        await clock.sync(samples=3)
+        self.assertLess(clock.rtt, 30)
+        self.assertAlmostEqual(clock.offset, 5000, delta=20)
+        self.assertAlmostEqual(clock.now(), time.time() * 1000 + 5000, delta=20)
+        self.assertEqual(clock.metrics()["samples"], 3)
+
+    async def test_resync_on_timestamp_error(self):
+        client = binance.Client("key", "secret")
+        calls = []
+
+        async def fetch_time():
+            return {"serverTime": time.time() * 1000 + 60000}
+
+        async def send(path, method, signed, send_api_key, **kwargs):
+            calls.append(client.http.timestamp())
+            if len(calls) == 1:
+                raise BinanceError("Timestamp outside of the recvWindow.", -1021)
+            return {}
+
+        client.clock.fetch_time = fetch_time
+        client.http._send_api_call = send
+        await client.http.send_api_call("/api/v3/account", signed=True, params={})
+        self.assertEqual(len(calls), 2)
+        self.assertGreater(calls[1], time.time() * 1000 + 50000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import sys, unittest, asyncio, json
+
+sys.path.append("../")
+import binance
+from binance.decoding import get_loads, accepts_bytes
+
+
+def str_loads(data):
+    # like the decoders that only accept str
+    if not isinstance(data, str):
+        raise TypeError("the JSON object must be str")
+    return json.loads(data)
+
+
+class FakeResponse:
+    status = 200
+    headers = {}
+
+    async def read(self):
+        return b'{"serverTime": 1}'
+
+
+class TestDecoders(unittest.TestCase):
+    def test_get_loads(self):
+        self.assertIs(get_loads("json"), json.loads)
+        self.assertIs(get_loads(str_loads), str_loads)
+        self.assertEqual(get_loads()(b'{"a": 1}'), {"a": 1})
+        with self.assertRaises(ImportError):
+            get_loads("not_a_json_decoder")
+
+    def test_accepts_bytes(self):
+        self.assertTrue(accepts_bytes(None))
+        self.assertTrue(accepts_bytes("json"))
+        self.assertFalse(accepts_bytes(str_loads))
+
+
+class TestRestDecoding(unittest.IsolatedAsyncioTestCase):
+    async def test_str_only_decoder(self):
+        client = binance.Client("key", "secret", json_decoder=str_loads)
+        payload = await client.http.handle_errors(FakeResponse())
+        self.assertEqual(payload, {"serverTime": 1})
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
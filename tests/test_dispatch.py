@@ -0,0 +1,128 @@
+import sys, unittest, asyncio, pickle, threading
+
+sys.path.append("../")
+from binance.dispatch import HandlerExecutor, OverflowPolicy
+from binance.events import Events, TradeWrapper, SymbolBookTickerWrapper
+
+
+def trade(symbol, trade_id):
+    return {"e": "trade", "s": symbol, "t": trade_id}
+
+
+def book_ticker(symbol, update_id):
+    # the book ticker payloads have no "e" field
+    return {
+        "u": update_id,
+        "s": symbol,
+        "b": f"{update_id}.0",
+        "B": "1",
+        "a": f"{update_id + 1}.0",
+        "A": "2",
+    }
+
+
+class TestHandlerExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_ordered_per_symbol(self):
+        events = Events()
+        received = []
+        executor = HandlerExecutor(lanes=2)
+        events.register_event(lambda event: received.append((event.symbol, event.trade_id)), "!trade")
+        events.set_executor("!trade", executor)
+        for i in range(50):
+            await events.dispatch(trade("ETHBTC" if i % 2 else "BNBBTC", i), "!trade")
+        while executor.processed < 50:
+            await asyncio.sleep(0.01)
+        executor.close()
+        for symbol in ("ETHBTC", "BNBBTC"):
+            ids = [i for s, i in received if s == symbol]
+            self.assertEqual(ids, sorted(ids))
+        self.assertEqual(executor.metrics()["queue_depth"], 0)
+
+    async def test_coalesce_latest(self):
+        unblock = threading.Event()
+        received = []
+
+        def listener(event):
+            unblock.wait()
+            received.append(event.trade_id)
+
+        executor = HandlerExecutor(lanes=1, overflow=OverflowPolicy.COALESCE_LATEST)
+        await executor.submit(listener, (TradeWrapper(trade("ETHBTC", 0), None),))
+        await asyncio.sleep(0.05)  # the first event is being handled
+        for i in range(1, 10):
+            await executor.submit(listener, (TradeWrapper(trade("ETHBTC", i), None),))
+        self.assertEqual(executor.queue_depth, 1)
+        unblock.set()
+        while executor.processed < 2:
+            await asyncio.sleep(0.01)
+        executor.close()
+        self.assertEqual(received, [0, 9])
+
+    async def test_drop_oldest(self):
+        executor = HandlerExecutor(lanes=1, max_queue_size=3, overflow=OverflowPolicy.DROP_OLDEST)
+        release = threading.Event()
+        handled = []
+
+        def listener(event):
+            # the first event holds the worker until the queue has overflowed
+            release.wait()
+            handled.append(event.trade_id)
+
+        await executor.submit(listener, (TradeWrapper(trade("ETHBTC", 0), None),))
+        while executor.queue_depth:
+            await asyncio.sleep(0)
+        for i in range(1, 6):
+            await executor.submit(listener, (TradeWrapper(trade("ETHBTC", i), None),))
+        self.assertEqual(executor.dropped, 2)
+        self.assertEqual(executor.queue_depth, 3)
+        release.set()
+        while executor.processed < 4:
+            await asyncio.sleep(0.01)
+        self.assertEqual(handled, [0, 3, 4, 5])
+        executor.close()
+
+    def test_wrapper_pickles_without_handlers(self):
+        event = pickle.loads(pickle.dumps(TradeWrapper(trade("ETHBTC", 1), [print])))
+        self.assertEqual(event.trade_id, 1)
+        self.assertIsNone(event.handlers)
+
+
+class TestConflation(unittest.IsolatedAsyncioTestCase):
+    async def test_latest_value_per_symbol(self):
+        events = Events()
+        received = []
+
+        async def listener(event):
+            received.append((event.symbol, event.order_book_updated))
+            await asyncio.sleep(0.01)
+
+        events.register_event(listener, "!bookTicker", conflate=True)
+        for i in range(20):
+            await events.dispatch(
+                book_ticker("ETHBTC" if i % 2 else "BNBBTC", i), "!bookTicker"
+            )
+        await asyncio.sleep(0.1)
+        # the listener only had time to receive the newest quote of both symbols
+        self.assertEqual(received, [("BNBBTC", 18), ("ETHBTC", 19)])
+        snapshot = events.snapshot("!bookTicker")
+        self.assertIsInstance(snapshot["ETHBTC"], SymbolBookTickerWrapper)
+        self.assertEqual(snapshot["ETHBTC"].best_bid_price, "19.0")
+
+    async def test_symbol_book_ticker_stream(self):
+        events = Events()
+        received = []
+
+        async def listener(event):
+            received.append(event.best_ask_quantity)
+
+        events.register_event(listener, "ethbtc@bookTicker")
+        await events.dispatch(book_ticker("ETHBTC", 1), "ethbtc@bookTicker")
+        self.assertEqual(received, ["2"])
+        self.assertIn("ethbtc@bookTicker", events.routes)
+        events.unregister(listener, "ethbtc@bookTicker")
+        self.assertNotIn("ethbtc@bookTicker", events.registered_streams)
+        self.assertNotIn("ethbtc@bookTicker", events.routes)
+
+
+if __name__ == "__main__":
+    unittest.main()
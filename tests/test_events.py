@@ -0,0 +1,85 @@
+import sys, unittest
+from decimal import Decimal
+
+sys.path.append("../")
+from binance.events import Events, TradeWrapper, KlineWrapper, OutboundAccountPositionWrapper
+
+TRADE = {
+    "e": "trade",
+    "E": 123456789,
+    "s": "BNBBTC",
+    "t": 12345,
+    "p": "0.001",
+    "q": "100",
+    "b": 88,
+    "a": 50,
+    "T": 123456785,
+    "m": True,
+    "M": True,
+    "stream": "bnbbtc@trade",
+}
+
+
+class TestWrappers(unittest.TestCase):
+    def test_lazy_fields(self):
+        event = Events().wrap_event(dict(TRADE))
+        self.assertIsInstance(event, TradeWrapper)
+        self.assertFalse(hasattr(event, "__dict__"))
+        self.assertEqual(event.price, "0.001")
+        self.assertEqual(event.as_decimal("price"), Decimal("0.001"))
+        self.assertIs(event.as_decimal("price"), event.as_decimal("price"))
+        self.assertEqual(event.as_float("quantity"), 100.0)
+
+    def test_nested_and_derived_fields(self):
+        kline = KlineWrapper({"e": "kline", "k": {"o": "1.5", "x": False}}, None)
+        self.assertEqual(kline.kline_open_price, "1.5")
+        self.assertFalse(kline.kline_closed)
+        position = OutboundAccountPositionWrapper(
+            {"E": 1, "u": 2, "B": [{"a": "ETH", "f": "1.0", "l": "0.5"}]}, None
+        )
+        self.assertEqual(position.balances["ETH"], {"free": "1.0", "locked": "0.5"})
+        self.assertIs(position.balances, position.balances)
+
+
+class TestDispatch(unittest.IsolatedAsyncioTestCase):
+    async def test_dispatch_to_registered_stream(self):
+        events = Events()
+        received = []
+
+        async def listener(event):
+            received.append(event)
+
+        events.register_event(listener, "bnbbtc@trade")
+        await events.dispatch(dict(TRADE), "bnbbtc@trade")
+        await events.dispatch(dict(TRADE), "ethbtc@trade")
+        self.assertEqual(len(received), 1)
+        self.assertIsInstance(received[0], TradeWrapper)
+        self.assertNotIn("ethbtc@trade", events.handlers)
+
+    async def test_payload_typed_stream(self):
+        events = Events()
+        received = []
+
+        async def listener(event):
+            received.append(event.symbol)
+
+        events.register_event(listener, "!miniTicker@arr")
+        ticker = {"e": "24hrMiniTicker", "s": "ETHBTC"}
+        await events.dispatch(ticker, "!miniTicker@arr")
+        await events.dispatch(ticker, "!miniTicker@arr")
+        self.assertEqual(received, ["ETHBTC", "ETHBTC"])
+
+    async def test_unregister_single_listener(self):
+        events = Events()
+        first, second = lambda event: None, lambda event: None
+        events.register_event(first, "bnbbtc@trade")
+        events.register_event(second, "bnbbtc@trade")
+        events.unregister(first, "bnbbtc@trade")
+        self.assertIn("bnbbtc@trade", events.registered_streams)
+        events.unregister(second, "bnbbtc@trade")
+        self.assertNotIn("bnbbtc@trade", events.registered_streams)
+        self.assertNotIn("bnbbtc@trade", events.routes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys, unittest
+from decimal import Decimal
+
+sys.path.append("../")
+from binance.errors import FilterError
+from binance.filters import SymbolRules, to_units, format_units
+
+ETHBTC = {
+    "baseAssetPrecision": 8,
+    "filters": {
+        "PRICE_FILTER": {"minPrice": "0.00000100", "maxPrice": "922327.00000000", "tickSize": "0.00000100"},
+        "PERCENT_PRICE": {"multiplierUp": "5", "multiplierDown": "0.2", "avgPriceMins": 5},
+        "LOT_SIZE": {"minQty": "0.00010000", "maxQty": "100000.00000000", "stepSize": "0.00010000"},
+        "MIN_NOTIONAL": {"minNotional": "0.00010000", "applyToMarket": True, "avgPriceMins": 5},
+    },
+}
+
+# a tick size with more decimals than the base asset precision
+SHIBEUR = {
+    "baseAssetPrecision": 2,
+    "quoteAssetPrecision": 8,
+    "filters": {
+        "PRICE_FILTER": {"minPrice": "0.00000001", "maxPrice": "1000.00000000", "tickSize": "0.00000001"},
+        "LOT_SIZE": {"minQty": "1.00", "maxQty": "92141578.00", "stepSize": "1.00"},
+    },
+}
+
+
+class TestUnits(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(to_units("12.3456", 2), 1234)
+        self.assertEqual(to_units(Decimal("1E-3"), 4), 10)
+        self.assertEqual(to_units(0.29, 2), 29)
+        self.assertEqual(format_units(1200, 2), "12")
+        self.assertEqual(format_units(5, 3), "0.005")
+
+
+class TestSymbolRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = SymbolRules("ETHBTC", ETHBTC)
+
+    def test_round(self):
+        self.assertEqual(self.rules.round_price("0.0712349999"), "0.071234")
+        self.assertEqual(self.rules.round_price(Decimal("0.07")), "0.07")
+        self.assertEqual(self.rules.round_quantity("1.23456789"), "1.2345")
+        self.assertEqual(self.rules.round_quote_amount("1.123456789"), "1.12345678")
+        self.assertEqual(self.rules.round_quantity("123456789.12345678"), "123456789.1234")
+
+    def test_round_arrays(self):
+        self.assertEqual(list(self.rules.round_prices([0.0712349, 0.29])), [0.071234, 0.29])
+        self.assertEqual(list(self.rules.round_quantities([1.23456])), [1.2345])
+
+    def test_validate(self):
+        self.rules.validate("0.071234", "1.2345", average_price="0.07")
+        with self.assertRaises(FilterError):
+            self.rules.validate(price="0.0712345")
+        with self.assertRaises(FilterError):
+            self.rules.validate(quantity="0.00001")
+        with self.assertRaises(FilterError):
+            self.rules.validate(price="0.5", average_price="0.07")
+        with self.assertRaises(FilterError):
+            self.rules.validate("0.000001", "0.0001")
+
+    def test_validate_floats(self):
+        # Decimal(0.07) is not a multiple of the tick size, "0.07" is
+        self.rules.validate(0.07, 1.2345, average_price=0.07)
+        with self.assertRaises(FilterError):
+            self.rules.validate(price=0.0712345)
+
+    def test_quote_precision(self):
+        rules = SymbolRules("SHIBEUR", SHIBEUR)
+        self.assertEqual(rules.round_price("0.000012345"), "0.00001234")
+        self.assertEqual(rules.round_quantity("12.5"), "12")
+        rules.validate("0.00001234", "12")
+        with self.assertRaises(FilterError):
+            rules.validate(quantity="12.5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys, unittest, asyncio, time
+
+sys.path.append("../")
+import binance
+from binance.metrics import Metrics, Histogram, CallbackExporter
+from binance.web_sockets import MarketEventsDataStream, MarketStreamConnection
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram("latency", "Latency.", ("path",), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value, ("/api/v3/order",))
+        self.assertEqual(histogram.quantile(0.5, ("/api/v3/order",)), 1)
+        self.assertEqual(histogram.quantile(0.99, ("/api/v3/order",)), float("inf"))
+        self.assertEqual(histogram.snapshot()[("/api/v3/order",)]["count"], 4)
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=(0.1, 1))
+        metrics.request_duration.observe(0.5, ("GET", "/api/v3/time"))
+        metrics.used_weight.set(12, ("REQUEST_WEIGHT_1M",))
+        text = metrics.prometheus()
+        self.assertIn("# TYPE binance_request_duration_seconds histogram", text)
+        self.assertIn(
+            'binance_request_duration_seconds_bucket{method="GET",path="/api/v3/time",le="0.1"} 0',
+            text,
+        )
+        self.assertIn(
+            'binance_request_duration_seconds_bucket{method="GET",path="/api/v3/time",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('binance_used_weight{limit="REQUEST_WEIGHT_1M"} 12', text)
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def test_stream_and_handler_metrics(self):
+        metrics = Metrics()
+        client = binance.Client(metrics=metrics)
+        client.events.register_event(lambda event: None, "ethbtc@trade")
+        connection = MarketStreamConnection(
+            MarketEventsDataStream(client, "", None), ["ethbtc@trade"]
+        )
+        message = '{"stream":"ethbtc@trade","data":{"e":"trade","E":%d,"s":"ETHBTC"}}'
+        data = message % (time.time() * 1000 - 250)
+        connection._measure(metrics, data, client.loads(data))
+        await client.events.dispatch(client.loads(data)["data"], "ethbtc@trade")
+        # responses to the subscription requests are not counted
+        connection._measure(metrics, '{"result":null,"id":1}', {"result": None, "id": 1})
+
+        self.assertEqual(metrics.messages.values, {("ethbtc@trade",): 1})
+        self.assertEqual(metrics.received_bytes.values[("ethbtc@trade",)], len(data))
+        lag = metrics.event_lag.snapshot()[("ethbtc@trade",)]["mean"]
+        self.assertAlmostEqual(lag, 0.25, delta=0.1)
+        self.assertEqual(metrics.handler_duration.values[("ethbtc@trade",)][2], 1)
+
+    async def test_callback_exporter(self):
+        exported = []
+        metrics = Metrics()
+        metrics.messages.inc(("user",))
+        exporter = CallbackExporter(metrics, exported.append, interval=0.01)
+        exporter.start()
+        await asyncio.sleep(0.05)
+        exporter.stop()
+        self.assertTrue(exported)
+        self.assertEqual(
+            exported[0]["binance_websocket_messages_total"], {("user",): 1}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys, unittest, asyncio
+from decimal import Decimal
+
+sys.path.append("../")
+from binance.events import Events, DiffDepthWrapper, Handlers
+from binance.order_book import OrderBook, BookSide
+
+
+class FakeClient:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.events = Events()
+
+    async def fetch_order_book(self, symbol, limit=100):
+        await asyncio.sleep(0)
+        return self.snapshot
+
+
+def depth_event(first, final, bids=(), asks=()):
+    return DiffDepthWrapper(
+        {
+            "e": "depthUpdate",
+            "E": 0,
+            "s": "ETHBTC",
+            "U": first,
+            "u": final,
+            "b": [list(level) for level in bids],
+            "a": [list(level) for level in asks],
+        },
+        Handlers(),
+    )
+
+
+class TestBookSide(unittest.TestCase):
+    def test_best_levels(self):
+        bids = BookSide(descending=False)
+        asks = BookSide(descending=True)
+        for price in ("1.0", "3.0", "2.0"):
+            bids.update(price, "1")
+            asks.update(price, "1")
+        self.assertEqual(bids.best()[0], Decimal("3.0"))
+        self.assertEqual(asks.best()[0], Decimal("1.0"))
+        bids.update("3.0", "0")
+        self.assertEqual(bids.best()[0], Decimal("2.0"))
+        self.assertEqual([p for p, _ in asks.levels(2)], [Decimal(1), Decimal(2)])
+
+
+class TestOrderBook(unittest.IsolatedAsyncioTestCase):
+    async def test_sync_from_snapshot(self):
+        client = FakeClient(
+            {
+                "lastUpdateId": 10,
+                "bids": [["0.5", "1"], ["0.4", "2"]],
+                "asks": [["0.6", "1"]],
+            }
+        )
+        book = OrderBook(client, "ETHBTC")
+        await book._handle_depth_event(depth_event(5, 9, bids=[("0.1", "1")]))
+        await book._handle_depth_event(depth_event(10, 12, bids=[("0.55", "3")]))
+        await book._snapshot_task
+        self.assertTrue(book.synced)
+        self.assertEqual(book.best_bid(), (Decimal("0.55"), Decimal("3")))
+        self.assertEqual(book.bids.quantity("0.1"), 0)
+
+        await book._handle_depth_event(depth_event(13, 13, asks=[("0.6", "0")]))
+        self.assertIsNone(book.best_ask())
+        self.assertEqual(book.last_update_id, 13)
+
+    async def test_gap_triggers_resync(self):
+        client = FakeClient({"lastUpdateId": 10, "bids": [], "asks": []})
+        book = OrderBook(client, "ETHBTC")
+        await book._handle_depth_event(depth_event(10, 11))
+        await book._snapshot_task
+        await book._handle_depth_event(depth_event(15, 16))
+        self.assertFalse(book.synced)
+
+    async def test_failed_snapshot_is_retried(self):
+        client = FakeClient({"lastUpdateId": 10, "bids": [["0.5", "1"]], "asks": []})
+        fetches = []
+        fetch_order_book = client.fetch_order_book
+
+        async def failing_fetch_order_book(symbol, limit=100):
+            fetches.append(symbol)
+            if len(fetches) == 1:
+                raise asyncio.TimeoutError()
+            return await fetch_order_book(symbol, limit)
+
+        client.fetch_order_book = failing_fetch_order_book
+        book = OrderBook(client, "ETHBTC")
+        book.retry_base = 0
+        await book._handle_depth_event(depth_event(10, 11))
+        await book._snapshot_task
+        self.assertIsNone(book._snapshot_task)
+        await book._handle_depth_event(depth_event(12, 12))
+        await book._snapshot_task
+        self.assertEqual(len(fetches), 2)
+        self.assertTrue(book.synced)
+        self.assertEqual(book.last_update_id, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys, unittest, asyncio
+
+sys.path.append("../")
+import binance
+from binance.errors import BinanceError, FilterError
+
+
+class TestBatchOrders(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = binance.Client("key", "secret")
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def send_api_call(path, method="GET", signed=False, **kwargs):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            self.sent.append(kwargs["data"])
+            if str(kwargs["data"]["price"]) == "14":
+                raise BinanceError("Filter failure: PRICE_FILTER")
+            return {"orderId": len(self.sent)}
+
+        self.client.http.send_api_call = send_api_call
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_create_orders(self):
+        orders = [
+            {
+                "symbol": "ETHBTC",
+                "side": binance.Side.BUY,
+                "order_type": binance.OrderType.LIMIT,
+                "time_in_force": binance.TimeInForce.GTC,
+                "quantity": "1",
+                "price": str(price),
+            }
+            for price in range(10, 20)
+        ]
+        orders[3].pop("time_in_force")
+        orders[5]["qty"] = orders[5].pop("quantity")
+        results = await self.client.create_orders(orders, concurrency=4)
+        self.assertEqual(len(results), 10)
+        self.assertIsInstance(results[3], ValueError)
+        self.assertIsInstance(results[4], BinanceError)
+        self.assertIsInstance(results[5], TypeError)
+        self.assertEqual(sum(isinstance(result, dict) for result in results), 7)
+        self.assertEqual(len(self.sent), 8)
+        self.assertLessEqual(self.max_in_flight, 4)
+
+    async def test_symbol_filters_are_checked_first(self):
+        self.client._apply_exchange_info(
+            {
+                "rateLimits": [],
+                "symbols": [
+                    {
+                        "symbol": "ETHBTC",
+                        "status": "TRADING",
+                        "baseAsset": "ETH",
+                        "baseAssetPrecision": 8,
+                        "quoteAsset": "BTC",
+                        "filters": [
+                            {"filterType": "PRICE_FILTER", "tickSize": "0.01"},
+                            {
+                                "filterType": "LOT_SIZE",
+                                "minQty": "0.1",
+                                "maxQty": "1000",
+                                "stepSize": "0.1",
+                            },
+                            {"filterType": "MIN_NOTIONAL", "minNotional": "10"},
+                        ],
+                    }
+                ],
+            }
+        )
+        orders = [
+            {
+                "symbol": "ETHBTC",
+                "side": "BUY",
+                "order_type": "LIMIT",
+                "time_in_force": "GTC",
+                "quantity": quantity,
+                "price": "20",
+            }
+            for quantity in ("1", "0.05", "0.2")
+        ]
+        results = await self.client.create_orders(orders)
+        # below the minimum quantity, then below the minimum notional
+        self.assertIsInstance(results[1], FilterError)
+        self.assertIsInstance(results[2], FilterError)
+        self.assertEqual(results[0], {"orderId": 1})
+        self.assertEqual(len(self.sent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import sys, unittest
+
+sys.path.append("../")
+import binance
+
+
+class TestPagination(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = binance.Client("key", "secret")
+        self.calls = []
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_iter_klines(self):
+        async def fetch_klines(symbol, interval, start_time, end_time, limit):
+            self.calls.append(start_time)
+            end = min(start_time + limit * 60000, end_time)
+            return [
+                [t, "1", "1", "1", "1", "1", t + 59999]
+                for t in range(start_time, end, 60000)
+            ]
+
+        self.client.fetch_klines = fetch_klines
+        klines = [
+            kline[0]
+            async for kline in self.client.iter_klines(
+                "ETHBTC", binance.Interval.ONE_MINUTE, 60000, 60000 * 26, limit=10
+            )
+        ]
+        self.assertEqual(klines, list(range(60000, 60000 * 26, 60000)))
+        self.assertEqual(self.calls, [60000, 60000 * 11, 60000 * 21])
+
+    async def test_iter_klines_follows_close_times(self):
+        # monthly klines do not have a fixed length
+        opens = [0, 31, 59, 90, 120, 151, 181]
+
+        async def fetch_klines(symbol, interval, start_time, end_time, limit):
+            self.calls.append(start_time)
+            page = [t for t in opens if t >= start_time][:limit]
+            return [
+                [t, "1", "1", "1", "1", "1", opens[opens.index(t) + 1] - 1]
+                for t in page
+                if t != opens[-1]
+            ]
+
+        self.client.fetch_klines = fetch_klines
+        klines = [
+            kline[0]
+            async for kline in self.client.iter_klines(
+                "ETHBTC", binance.Interval.ONE_MONTH, 1, limit=2
+            )
+        ]
+        self.assertEqual(klines, [31, 59, 90, 120, 151])
+        self.assertEqual(self.calls, [1, 90, 151])
+
+    async def test_iter_aggregate_trades_stops_at_end_time(self):
+        async def fetch_aggregate_trades_list(symbol, limit, from_id=None, **kwargs):
+            self.calls.append(from_id)
+            first = from_id or 0
+            return [{"a": i, "T": i * 10} for i in range(first, first + limit)]
+
+        self.client.fetch_aggregate_trades_list = fetch_aggregate_trades_list
+        trades = [
+            trade["a"]
+            async for trade in self.client.iter_aggregate_trades(
+                "ETHBTC", start_time=1, end_time=245, limit=10
+            )
+        ]
+        self.assertEqual(trades, list(range(25)))
+        self.assertEqual(self.calls[:3], [None, 10, 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
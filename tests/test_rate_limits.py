@@ -0,0 +1,52 @@
+import sys, unittest, time
+
+sys.path.append("../")
+from binance.errors import QueryCanceled
+from binance.rate_limits import RateLimiter, request_weight, orders_count
+
+
+class TestWeights(unittest.TestCase):
+    def test_endpoint_weights(self):
+        self.assertEqual(request_weight("/api/v3/depth", params={"limit": 5000}), 50)
+        self.assertEqual(request_weight("/api/v3/depth", params={"symbol": "A"}), 1)
+        self.assertEqual(request_weight("/api/v3/ticker/24hr"), 40)
+        self.assertEqual(request_weight("/api/v3/ticker/24hr", params={"symbol": "A"}), 1)
+        self.assertEqual(request_weight("/api/v3/order", "GET", {"symbol": "A"}), 2)
+        self.assertEqual(orders_count("/api/v3/order/oco", "POST"), 2)
+        self.assertEqual(orders_count("/api/v3/order/test", "POST"), 0)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_cancel_above_max_wait(self):
+        limiter = RateLimiter(
+            [
+                {
+                    "rateLimitType": "REQUEST_WEIGHT",
+                    "interval": "DAY",
+                    "intervalNum": 1,
+                    "limit": 10,
+                }
+            ],
+            max_wait=1,
+        )
+        await limiter.acquire(6)
+        with self.assertRaises(QueryCanceled):
+            await limiter.acquire(6)
+        await limiter.acquire(4)
+
+    async def test_headers_resync(self):
+        limiter = RateLimiter()
+        limiter.update({"X-MBX-USED-WEIGHT-1M": "1199", "X-MBX-ORDER-COUNT-10S": "3"})
+        self.assertEqual(limiter.usage()["REQUEST_WEIGHT_1M"], 1199)
+        self.assertEqual(limiter.usage()["ORDERS_10S"], 3)
+
+    async def test_retry_after_blocks(self):
+        limiter = RateLimiter(max_wait=0)
+        limiter.block(30)
+        self.assertGreater(limiter.blocked_until, time.time())
+        with self.assertRaises(QueryCanceled):
+            await limiter.acquire(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
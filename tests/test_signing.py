@@ -0,0 +1,96 @@
+import sys, unittest, base64
+from urllib.parse import unquote
+
+from aiohttp import web
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+except ImportError:  # cryptography is an optional dependency
+    ed25519 = None
+
+sys.path.append("../")
+from binance.http import HttpClient
+from binance.signing import HmacSigner, Ed25519Signer, RsaSigner
+
+
+def pem(private_key):
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+class TestSigners(unittest.TestCase):
+    def test_hmac_reuses_key(self):
+        signer = HmacSigner("secret")
+        self.assertEqual(signer.sign("a=1"), signer.sign("a=1"))
+        self.assertNotEqual(signer.sign("a=1"), signer.sign("a=2"))
+
+    @unittest.skipIf(ed25519 is None, "cryptography is not installed")
+    def test_ed25519(self):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        signature = Ed25519Signer(pem(private_key)).sign("symbol=BTCUSDT")
+        private_key.public_key().verify(
+            base64.b64decode(unquote(signature)), b"symbol=BTCUSDT"
+        )
+
+    @unittest.skipIf(ed25519 is None, "cryptography is not installed")
+    def test_rsa(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        signature = RsaSigner(pem(private_key)).sign("symbol=BTCUSDT")
+        self.assertNotIn("+", signature)
+        private_key.public_key().verify(
+            base64.b64decode(unquote(signature)),
+            b"symbol=BTCUSDT",
+            padding.PKCS1v15(),
+            hashes.SHA256(),
+        )
+
+
+class TestSignedQueries(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.received = []
+
+        async def handle(request):
+            self.received.append(
+                (request.query_string, (await request.read()).decode())
+            )
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_route("*", "/api/v3/order", handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        endpoint = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self.http = HttpClient("key", "secret", endpoint, None, None)
+        self.http.timestamp = lambda: 1499827319559
+
+    async def asyncTearDown(self):
+        await self.http.close_session()
+        await self.runner.cleanup()
+
+    async def test_signed_payloads_are_sent_verbatim(self):
+        params = {"symbol": "LTCBTC", "orderId": 1}
+        await self.http.send_api_call("/api/v3/order", params=params, signed=True)
+        await self.http.send_api_call(
+            "/api/v3/order", "POST", data={"symbol": "LTCBTC"}, signed=True
+        )
+        signer = HmacSigner("secret")
+        query = "symbol=LTCBTC&orderId=1&timestamp=1499827319559"
+        body = "symbol=LTCBTC&timestamp=1499827319559"
+        self.assertEqual(
+            self.received,
+            [
+                (f"{query}&signature={signer.sign(query)}", ""),
+                ("", f"{body}&signature={signer.sign(body)}"),
+            ],
+        )
+        # the parameters of the caller are left untouched
+        self.assertEqual(params, {"symbol": "LTCBTC", "orderId": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
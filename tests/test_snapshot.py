@@ -0,0 +1,107 @@
+import sys, unittest, asyncio, copy, os, tempfile
+
+sys.path.append("../")
+import binance
+from binance.snapshot import save_exchange_info, load_exchange_info
+
+INFOS = {
+    "timezone": "UTC",
+    "serverTime": 1,
+    "rateLimits": [
+        {
+            "rateLimitType": "REQUEST_WEIGHT",
+            "interval": "MINUTE",
+            "intervalNum": 1,
+            "limit": 1200,
+        }
+    ],
+    "symbols": [
+        {
+            "symbol": "ETHBTC",
+            "status": "TRADING",
+            "baseAsset": "ETH",
+            "baseAssetPrecision": 8,
+            "quoteAsset": "BTC",
+            "filters": [
+                {
+                    "filterType": "PRICE_FILTER",
+                    "minPrice": "0.00000100",
+                    "maxPrice": "100000.00000000",
+                    "tickSize": "0.00000100",
+                },
+                {
+                    "filterType": "LOT_SIZE",
+                    "minQty": "0.00100000",
+                    "maxQty": "100000.00000000",
+                    "stepSize": "0.00100000",
+                },
+            ],
+        }
+    ],
+}
+
+
+class TestSnapshot(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "exchange_info.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        save_exchange_info(self.path, INFOS)
+        infos, saved_at = load_exchange_info(self.path)
+        self.assertEqual(infos, INFOS)
+        self.assertIsNone(load_exchange_info(self.path, max_age=-1))
+        self.assertIsNone(load_exchange_info(self.path + ".missing"))
+        with open(self.path, "r+b") as file:
+            file.write(b"JUNK")
+        self.assertIsNone(load_exchange_info(self.path))
+
+    async def test_load_from_snapshot_then_refresh(self):
+        client = binance.Client()
+        fetched = []
+        changed = copy.deepcopy(INFOS)
+        changed["serverTime"] = 2
+        changed["symbols"][0]["status"] = "BREAK"
+
+        async def fetch_exchange_info():
+            fetched.append(True)
+            await asyncio.sleep(0)
+            return copy.deepcopy(changed)
+
+        client.fetch_exchange_info = fetch_exchange_info
+        save_exchange_info(self.path, INFOS)
+        await client.load(self.path)
+        # the client is usable before the refresh
+        self.assertTrue(client.loaded)
+        self.assertEqual(client.symbols["ETHBTC"]["status"], "TRADING")
+        filters = client.symbols["ETHBTC"]["filters"]
+        self.assertEqual(filters["LOT_SIZE"]["stepSize"], "0.00100000")
+        self.assertEqual(client.refine_amount("ETHBTC", "1.23456"), "1.234")
+        await client._refresh
+        self.assertEqual(fetched, [True])
+        self.assertEqual(client.symbols["ETHBTC"]["status"], "BREAK")
+        self.assertEqual(load_exchange_info(self.path)[0], changed)
+        await client.close()
+
+    async def test_load_without_snapshot(self):
+        client = binance.Client()
+
+        infos = copy.deepcopy(INFOS)
+
+        async def fetch_exchange_info():
+            return infos
+
+        client.fetch_exchange_info = fetch_exchange_info
+        await client.load(self.path)
+        self.assertIn("ETHBTC", client.symbols)
+        # the received infos are not mutated
+        self.assertEqual(infos, INFOS)
+        self.assertEqual(load_exchange_info(self.path)[0], INFOS)
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys, unittest
+
+sys.path.append("../")
+from binance.symbols import SymbolTable
+
+
+def symbol(name, base, quote, status="TRADING", permissions=("SPOT",)):
+    return {
+        "symbol": name,
+        "status": status,
+        "baseAsset": base,
+        "baseAssetPrecision": 8,
+        "quoteAsset": quote,
+        "quotePrecision": 8,
+        "orderTypes": ["LIMIT", "MARKET"],
+        "permissions": list(permissions),
+        "defaultSelfTradePreventionMode": "NONE",
+        "filters": [{"filterType": "LOT_SIZE", "stepSize": "0.001"}],
+    }
+
+
+SYMBOLS = [
+    symbol("ETHBTC", "ETH", "BTC"),
+    symbol("BTCUSDT", "BTC", "USDT", permissions=("SPOT", "MARGIN")),
+    symbol("ETHUSDT", "ETH", "USDT", status="BREAK"),
+    symbol("BNBETH", "BNB", "ETH"),
+    symbol("XRPBNB", "XRP", "BNB"),
+]
+
+
+class TestSymbolTable(unittest.TestCase):
+    def setUp(self):
+        self.table = SymbolTable(SYMBOLS)
+
+    def test_backward_compatible_access(self):
+        info = self.table["ETHBTC"]
+        self.assertEqual(info["baseAsset"], "ETH")
+        self.assertEqual(info.quote_asset, "BTC")
+        self.assertEqual(info["filters"]["LOT_SIZE"], {"stepSize": "0.001"})
+        self.assertEqual(info["defaultSelfTradePreventionMode"], "NONE")
+        self.assertEqual(info.get("missing", 0), 0)
+        self.assertEqual(dict(info)["orderTypes"], ("LIMIT", "MARKET"))
+        self.assertIn("ETHBTC", self.table)
+        self.assertEqual(len(self.table), 5)
+        # identical lists and filters are shared between the symbols
+        self.assertIs(info.order_types, self.table["BNBETH"].order_types)
+        self.assertIs(info.filters, self.table["BNBETH"].filters)
+        # the symbol infos are read-only
+        with self.assertRaises(TypeError):
+            info["filters"]["LOT_SIZE"]["stepSize"] = "1"
+        with self.assertRaises(TypeError):
+            info["baseAsset"] = "BTC"
+
+    def test_permission_sets(self):
+        infos = dict(symbol("ETHBTC", "ETH", "BTC"), permissions=[])
+        infos["permissionSets"] = [["SPOT", "MARGIN"], ["TRD_GRP_004"]]
+        table = SymbolTable([infos])
+        self.assertEqual(table["ETHBTC"].permissions, ("MARGIN", "SPOT", "TRD_GRP_004"))
+        self.assertEqual(table.select(permission="MARGIN"), {"ETHBTC"})
+
+    def test_select(self):
+        self.assertEqual(
+            self.table.select(quote_asset="USDT"), {"BTCUSDT", "ETHUSDT"}
+        )
+        self.assertEqual(
+            self.table.select(quote_asset="USDT", status="TRADING"), {"BTCUSDT"}
+        )
+        self.assertEqual(self.table.select(permission="MARGIN"), {"BTCUSDT"})
+        self.assertEqual(self.table.select(base_asset="DOGE"), set())
+        self.assertEqual(
+            self.table.with_asset("ETH"), {"ETHBTC", "ETHUSDT", "BNBETH"}
+        )
+
+    def test_conversion_path(self):
+        self.assertEqual(
+            self.table.conversion_path("XRP", "USDT"),
+            [
+                ("XRPBNB", "SELL"),
+                ("BNBETH", "SELL"),
+                ("ETHBTC", "SELL"),
+                ("BTCUSDT", "SELL"),
+            ],
+        )
+        self.assertEqual(
+            self.table.conversion_path("USDT", "ETH"),
+            [("BTCUSDT", "BUY"), ("ETHBTC", "BUY")],
+        )
+        self.assertEqual(self.table.conversion_path("ETH", "ETH"), [])
+        self.assertIsNone(self.table.conversion_path("ETH", "DOGE"))
+
+
+if __name__ == "__main__":
+    unittest.main()
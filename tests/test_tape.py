@@ -0,0 +1,118 @@
+import sys, unittest, asyncio
+
+sys.path.append("../")
+from binance.events import Events, StreamGap
+
+try:
+    from binance.tape import TradeRing, TradeTape
+    import numpy
+except ImportError:  # numpy is an optional dependency
+    numpy = None
+
+
+def agg_trade(trade_id, price, quantity, time, buyer_is_maker=False):
+    return {
+        "e": "aggTrade",
+        "s": "ETHBTC",
+        "a": trade_id,
+        "p": price,
+        "q": quantity,
+        "T": time,
+        "m": buyer_is_maker,
+    }
+
+
+class FakeClient:
+    def __init__(self, history):
+        self.events = Events()
+        self.history = history
+
+    async def iter_aggregate_trades(self, symbol, from_id=None):
+        for trade in self.history:
+            if trade["a"] >= from_id:
+                await asyncio.sleep(0)
+                yield trade
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestTradeRing(unittest.TestCase):
+    def test_wrap_around(self):
+        ring = TradeRing(3)
+        for i in range(5):
+            ring.append(i, 10 + i, 1, i * 1000, i % 2 == 0)
+        price, quantity, time, ids, taker_buy = ring.window()
+        self.assertEqual(list(ids), [2, 3, 4])
+        self.assertEqual(list(price), [12, 13, 14])
+        self.assertEqual(ring.last_id, 4)
+        self.assertEqual(len(ring), 3)
+
+    def test_window_across_the_end(self):
+        ring = TradeRing(4)
+        for i in range(1, 7):
+            ring.append(i, i, 1, i * 1000, True)
+        # trades 3 and 4 are at the end of the arrays, 5 and 6 at the start
+        self.assertEqual(list(ring.window()[3]), [3, 4, 5, 6])
+        self.assertEqual(list(ring.window(2500)[3]), [4, 5, 6])
+        self.assertEqual(list(ring.window(1500)[3]), [5, 6])
+        self.assertEqual(ring.last_id, 6)
+
+    def test_window_queries(self):
+        ring = TradeRing(10)
+        self.assertEqual(ring.volume(1000), 0)
+        self.assertIsNone(ring.vwap())
+        ring.append(1, 10, 1, 1000, True)
+        ring.append(2, 20, 3, 2000, False)
+        ring.append(3, 30, 1, 3000, True)
+        self.assertEqual(ring.volume(), 5)
+        self.assertEqual(ring.vwap(), (10 + 60 + 30) / 5)
+        # the trades of the last 1.5 seconds before the last trade
+        self.assertEqual(ring.volume(1500), 4)
+        self.assertEqual(ring.vwap(1500), 90 / 4)
+        self.assertEqual(ring.imbalance(1500), (1 - 3) / 4)
+        self.assertEqual(ring.volume(1500, now=2500), 4)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestTradeTape(unittest.IsolatedAsyncioTestCase):
+    async def test_gap_fill(self):
+        history = [agg_trade(i, "1", "1", i * 1000) for i in range(1, 8)]
+        client = FakeClient(history)
+        tape = TradeTape(client, capacity=100)
+        tape.start(["ETHBTC"])
+        events = client.events
+        await events.dispatch(agg_trade(1, "1", "1", 1000), "ethbtc@aggTrade")
+        await events.dispatch(agg_trade(2, "1", "1", 2000), "ethbtc@aggTrade")
+        # trades 3 and 4 are missed during a reconnection
+        await events.gap_handlers(StreamGap(("ethbtc@aggTrade",), 0, 1))
+        await events.dispatch(agg_trade(5, "1", "1", 5000), "ethbtc@aggTrade")
+        await events.dispatch(agg_trade(6, "1", "1", 6000), "ethbtc@aggTrade")
+        while tape._gap_fills:
+            await asyncio.sleep(0)
+        await events.dispatch(agg_trade(7, "1", "1", 7000), "ethbtc@aggTrade")
+        self.assertEqual(list(tape["ETHBTC"].window()[3]), [1, 2, 3, 4, 5, 6, 7])
+        tape.stop()
+
+    async def test_restart(self):
+        history = [agg_trade(i, "1", "1", i * 1000) for i in range(1, 6)]
+        client = FakeClient(history)
+        events = client.events
+        tape = TradeTape(client, capacity=100)
+        tape.start(["ETHBTC"])
+        tape.start(["BNBBTC"])
+        await events.dispatch(agg_trade(1, "1", "1", 1000), "ethbtc@aggTrade")
+        tape.stop()
+        self.assertEqual(list(events.gap_handlers), [])
+        self.assertEqual(events.registered_streams, set())
+
+        # trades 2 to 4 are missed while the tape is stopped
+        tape.start(["ETHBTC"])
+        self.assertEqual(events.registered_streams, {"ethbtc@aggTrade"})
+        await events.dispatch(agg_trade(5, "1", "1", 5000), "ethbtc@aggTrade")
+        while tape._gap_fills:
+            await asyncio.sleep(0)
+        self.assertEqual(list(tape["ETHBTC"].window()[3]), [1, 2, 3, 4, 5])
+        tape.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys, unittest, math
+
+sys.path.append("../")
+import binance
+from binance.web_sockets import MarketEventsDataStream
+
+try:
+    from binance.tickers import TickerMatrix
+    import numpy
+except ImportError:  # numpy is an optional dependency
+    numpy = None
+
+
+def mini_ticker(symbol, close, time):
+    return {
+        "e": "24hrMiniTicker",
+        "E": time,
+        "s": symbol,
+        "c": close,
+        "o": "1",
+        "h": close,
+        "l": "0.5",
+        "v": "100",
+        "q": "50",
+    }
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestTickerMatrix(unittest.IsolatedAsyncioTestCase):
+    async def test_array_mode(self):
+        client = binance.Client()
+        observed = []
+        client.events.streams_observer = lambda added, removed: observed.append(
+            (added, removed)
+        )
+        matrix = TickerMatrix(client, "!miniTicker@arr", capacity=1)
+        snapshots = []
+
+        async def on_snapshot(matrix):
+            snapshots.append(matrix.column("last").copy())
+
+        matrix.handlers.append(on_snapshot)
+        matrix.start()
+        stream = MarketEventsDataStream(client, "", None)
+        await stream._handle_event(
+            {
+                "stream": "!miniTicker@arr",
+                "data": [
+                    mini_ticker("ETHBTC", "0.05", 1000),
+                    mini_ticker("BNBBTC", "0.01", 1001),
+                ],
+            }
+        )
+        await stream._handle_event(
+            {
+                "stream": "!miniTicker@arr",
+                "data": [mini_ticker("ETHBTC", "0.06", 2000)],
+            }
+        )
+
+        self.assertEqual([list(s) for s in snapshots], [[0.05, 0.01], [0.06, 0.01]])
+        self.assertEqual(matrix.symbols, ["ETHBTC", "BNBBTC"])
+        self.assertEqual(matrix.row("BNBBTC")["volume"], 100)
+        rows = matrix.rows(["BNBBTC", "ETHBTC"])
+        self.assertEqual(list(rows["event_time"]), [1001, 2000])
+        # the mini tickers have no bid
+        self.assertTrue(math.isnan(matrix.row("ETHBTC")["bid"]))
+        self.assertEqual(matrix.updated_at, 2000)
+
+        matrix.stop()
+        self.assertEqual(
+            observed, [(("!miniTicker@arr",), ()), ((), ("!miniTicker@arr",))]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
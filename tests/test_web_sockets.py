@@ -0,0 +1,186 @@
+import sys, unittest, asyncio, json
+from aiohttp import web
+
+sys.path.append("../")
+import binance
+from binance.web_sockets import shard_streams, expected_rate
+
+
+class TestSharding(unittest.TestCase):
+    def test_expected_rates(self):
+        self.assertEqual(expected_rate("btcusdt@kline_1m"), 0.5)
+        self.assertEqual(expected_rate("btcusdt@depth20@100ms"), 10)
+        self.assertEqual(expected_rate("!ticker@arr"), 100)
+        self.assertEqual(expected_rate("!bookTicker"), 500)
+        self.assertEqual(expected_rate("pqia91ma19a5s61cv6a81va65sdf19v8a65a1"), 1)
+        self.assertEqual(expected_rate("!unknown"), 1)
+
+    def test_max_streams_per_connection(self):
+        streams = [f"s{i}@trade" for i in range(10)]
+        shards = shard_streams(streams, 4)
+        self.assertEqual(len(shards), 3)
+        self.assertTrue(all(len(shard) <= 4 for shard in shards))
+        self.assertEqual(sorted(sum(shards, [])), sorted(streams))
+
+    def test_balanced_by_rate(self):
+        streams = ["!bookTicker"] + [f"s{i}@kline_1m" for i in range(6)]
+        shards = shard_streams(streams, 1024, connections=2)
+        self.assertEqual(shards[0], ["!bookTicker"])
+        self.assertEqual(len(shards[1]), 6)
+
+
+class FakeStreamServer:
+    # answers the live subscription methods like wss://stream.binance.com does
+    def __init__(self):
+        self.requests = []
+        self.subscriptions = []
+        self.connections = 0
+
+    async def handle(self, request):
+        self.connections += 1
+        self.subscriptions = [s for s in request.query.get("streams", "").split("/") if s]
+        web_socket = web.WebSocketResponse()
+        await web_socket.prepare(request)
+        async for msg in web_socket:
+            content = json.loads(msg.data)
+            self.requests.append(content)
+            if content["method"] == "CLOSE":
+                break
+            if content["method"] == "SEND":
+                # pushes the given messages as if they were stream events
+                for message in content["params"]:
+                    await web_socket.send_json(message)
+                continue
+            result = None
+            if content["method"] == "SUBSCRIBE":
+                self.subscriptions += content["params"]
+            elif content["method"] == "UNSUBSCRIBE":
+                self.subscriptions = [
+                    s for s in self.subscriptions if s not in content["params"]
+                ]
+            else:
+                result = self.subscriptions
+            await web_socket.send_json({"result": result, "id": content["id"]})
+        return web_socket
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+class TestLiveSubscriptions(unittest.IsolatedAsyncioTestCase):
+    async def test_subscribe_without_reconnecting(self):
+        server = FakeStreamServer()
+        endpoint = await server.start()
+        client = binance.Client("key", "secret")
+        client.events.register_event(print, "ethbtc@trade")
+        listener = asyncio.ensure_future(client.start_market_events_listener(endpoint))
+        await asyncio.sleep(0)
+        while not client.market_data_stream.connections[0].web_socket:
+            await asyncio.sleep(0.01)
+
+        client.events.register_event(print, "bnbbtc@trade")
+        client.events.register_event(print, "bnbbtc@kline_1m")
+        client.events.unregister(print, "ethbtc@trade")
+        while len(server.requests) < 2:
+            await asyncio.sleep(0.01)
+        self.assertEqual(
+            [request["method"] for request in server.requests],
+            ["UNSUBSCRIBE", "SUBSCRIBE"],
+        )
+        self.assertEqual(
+            sorted(await client.market_data_stream.list_subscriptions()),
+            ["bnbbtc@kline_1m", "bnbbtc@trade"],
+        )
+        self.assertEqual(len(client.market_data_stream.connections), 1)
+
+        await client.stop_market_events_listener()
+        listener.cancel()
+        await client.close()
+        await server.runner.cleanup()
+
+
+class TestReconnection(unittest.IsolatedAsyncioTestCase):
+    async def test_gap_after_reconnection(self):
+        server = FakeStreamServer()
+        endpoint = await server.start()
+        client = binance.Client("key", "secret")
+        gaps = []
+
+        async def failing_on_gap(gap):
+            raise ValueError("listener bug")
+
+        async def on_gap(gap):
+            gaps.append(gap)
+
+        client.events.register_gap_listener(failing_on_gap)
+        client.events.register_gap_listener(on_gap)
+        client.events.register_event(print, "ethbtc@trade")
+        listener = asyncio.ensure_future(client.start_market_events_listener(endpoint))
+        await asyncio.sleep(0)
+        connection = client.market_data_stream.connections[0]
+        connection.backoff_base = 0.01
+        while not connection.web_socket:
+            await asyncio.sleep(0.01)
+
+        # the fake server closes the connection when it receives this method
+        await connection.web_socket.send_json({"method": "CLOSE", "id": 0})
+        while not gaps:
+            await asyncio.sleep(0.01)
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(gaps[0].streams, ("ethbtc@trade",))
+        # the failing gap listener did not stop the listener
+        await asyncio.sleep(0.05)
+        self.assertFalse(listener.done())
+
+        await client.stop_market_events_listener()
+        await asyncio.wait_for(listener, 1)
+        await client.close()
+        await server.runner.cleanup()
+
+    async def test_failing_listener(self):
+        server = FakeStreamServer()
+        endpoint = await server.start()
+        client = binance.Client("key", "secret")
+        trades = []
+
+        async def on_trade(event):
+            if event.trade_id == 1:
+                raise RuntimeError("listener bug")
+            trades.append(event.trade_id)
+
+        client.events.register_event(on_trade, "ethbtc@trade")
+        listener = asyncio.ensure_future(client.start_market_events_listener(endpoint))
+        await asyncio.sleep(0)
+        connection = client.market_data_stream.connections[0]
+        while not connection.web_socket:
+            await asyncio.sleep(0.01)
+
+        messages = [
+            {"stream": "ethbtc@trade", "data": {"e": "trade", "s": "ETHBTC", "t": i}}
+            for i in (1, 2)
+        ]
+        await connection.web_socket.send_json(
+            {"method": "SEND", "params": messages, "id": 0}
+        )
+        for _ in range(100):
+            if trades or listener.done():
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(trades, [2])
+        self.assertFalse(listener.done())
+        self.assertEqual(server.connections, 1)
+
+        await client.stop_market_events_listener()
+        await asyncio.wait_for(listener, 1)
+        await client.close()
+        await server.runner.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()